@@ -0,0 +1,79 @@
+"""
+==============================================================
+Example: coalescing concurrent calls with the batcher decorator
+==============================================================
+
+This example benchmarks latency and throughput of a `predict` method called
+per item from many threads, with and without :class:`pydeco.decorators.Batcher`
+coalescing concurrent calls into calls of a batched implementation.
+
+"""
+import threading
+import time
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Batcher
+from pydeco.utils import Histogram
+
+###############################################################################
+# Create a model with a fixed cost per call and a small cost per item
+
+batcher = Batcher('predict_batch', max_batch_size=32, max_delay=.002)
+
+
+@MethodsDecorator(mapping={batcher: 'predict'})
+class Model():
+    """Model whose batched implementation amortizes a fixed cost."""
+
+    def __init__(self):
+        # ex: a single device running one kernel at a time
+        self.device = threading.Lock()
+
+    def predict(self, x):
+        return self.predict_batch([x])[0]
+
+    def predict_batch(self, xs):
+        # ex: launching a vectorized kernel on stacked inputs
+        with self.device:
+            time.sleep(.002 + 1e-5 * len(xs))
+        return [2 * x for x in xs]
+
+
+###############################################################################
+# Benchmark calls from concurrent threads
+
+def benchmark(model, n_threads=32, n_calls=20):
+    """Return throughput (calls/s) and latency percentiles (ms)."""
+    latencies = Histogram(resolution=1e-3)
+    lock = threading.Lock()
+
+    def run():
+        for i in range(n_calls):
+            ts = time.perf_counter()
+            model.predict(i)
+            with lock:
+                latencies.record((time.perf_counter() - ts) * 1000)
+
+    threads = [threading.Thread(target=run) for _ in range(n_threads)]
+    ts = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    throughput = n_threads * n_calls / (time.perf_counter() - ts)
+    return throughput, latencies.percentiles((50, 99))
+
+
+model = Model()
+
+model.deactivate_decorator('Batcher')
+throughput, (p50, p99) = benchmark(model)
+print('Without batching: {:.0f} calls/s, p50={:.2f} ms, p99={:.2f} ms'.format(
+    throughput, p50, p99))
+
+model.activate_decorator('Batcher')
+throughput, (p50, p99) = benchmark(model)
+print('With batching: {:.0f} calls/s, p50={:.2f} ms, p99={:.2f} ms'.format(
+    throughput, p50, p99))
+print('Mean batch size: {:.1f}'.format(
+    batcher.batch_size_by_func['predict'].mean))
@@ -116,3 +116,13 @@ instance.method_2()
 instance.method_3()
 
 print(timer)
+
+# deactivate timer for 'method_2' only (ex: a hot path)
+timer.deactivate(methods='method_2')
+
+# run methods
+instance.method_1()
+instance.method_2()
+instance.method_3()
+
+print(timer)
@@ -7,12 +7,19 @@ decorate which methods.
 
 """
 import logging
+import math
+import random
 import re
 from abc import abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from copy import deepcopy
 from functools import wraps
+from itertools import count
+from weakref import WeakValueDictionary
 
-from .utils import CONFIG, is_wrapped
+from .utils import CONFIG, wrapped_class
+from .utils.overhead import OverheadController
 
 global shared_wrappers
 shared_wrappers = globals()
@@ -21,78 +28,399 @@ from .utils.register import (assign, dispatch,  # noqa: E402
                              get_first_unassigned_wrapper,
                              make_wrapper_classname, register)
 
+# live decorators by stable id (see :attr:`Decorator.decorator_id`)
+_decorators = WeakValueDictionary()
+_decorator_counter = count()
+# context-local activation overrides (see :meth:`Decorator.override`)
+_overrides = ContextVar('pydeco_overrides', default=None)
+
+
+def get_decorator(decorator_id):
+    """Return the live decorator with input id (None if not found)."""
+    return _decorators.get(decorator_id)
+
 
 class Decorator(object):
-    """Decorator base class."""
+    """Decorator base class.
 
-    def __init__(self, *args, **kwargs):
-        self.instances = []
+    Parameters
+    ----------
+    sample_every : int | None
+        If set, only one call out of ``sample_every`` goes through
+        :meth:`wrapper`, the other calls directly run the decorated method.
+    sample_rate : float | None
+        If set, each call goes through :meth:`wrapper` with probability
+        ``sample_rate``. Cannot be combined with ``sample_every``.
+    overhead_budget : float | None
+        If set, maximum ratio between the decorator overhead and the decorated
+        method time (see :meth:`set_overhead_budget`).
+
+    Attributes
+    ----------
+    sample_weight : int | float
+        Expected number of calls represented by each sampled call (``1`` when
+        sampling is off). Stats decorators should scale their totals with it.
+    overhead_controller : OverheadController | None
+        Controller throttling the decorator to keep its overhead within
+        budget.
+    decorator_id : str | None
+        Stable id used to reference the decorator when pickling decorated
+        instances (ids only depend on the creation order of decorators).
+    instances : list
+        Instances whose decorated methods have been called.
+
+    Notes
+    -----
+    Pickled decorators do not hold the list of decorated instances.
+
+    If ``CONFIG['DISABLE']`` is True (or the ``PYDECO_DISABLE`` environment
+    variable is set, ex: ``PYDECO_DISABLE=1``) when a method is decorated,
+    the method is returned unchanged: the decorator never runs on it and
+    :meth:`is_active` returns False for instances it was never called on.
+
+    """
+
+    # sampling defaults (for subclasses not calling `Decorator.__init__`)
+    sampling = None
+    sample_weight = 1
+    _sample_countdown = 1
+    overhead_controller = None
+    decorator_id = None
+    # decorated instances ids (see :meth:`flush_instances`)
+    _instance_ids = frozenset()
+    # True if methods were left undecorated (see ``CONFIG['DISABLE']``)
+    _disabled = False
+    # names of decorated methods (see :meth:`activate`)
+    _methods = frozenset()
+    # False if copies cannot be timed on calls without arguments (see
+    # :func:`pydeco.utils.calibrate`)
+    probeable = True
+    # activation states as (stamp, is_active) by (class, method) scope (None
+    # for all classes or methods): the most recently set applicable state
+    # wins (see :meth:`activate`). The dict is replaced, never mutated.
+    _states = {(None, None): (0, True)}
+    _stamp = 0
+
+    def __init__(self, *args, sample_every=None, sample_rate=None,
+                 overhead_budget=None, **kwargs):
+        self.flush_instances()
+        self._register()
+        self.set_sampling(every=sample_every, rate=sample_rate)
+        if overhead_budget is not None:
+            self.set_overhead_budget(overhead_budget)
+
+    def __getstate__(self):
+        """Return state (without decorated instances)."""
+        state = self.__dict__.copy()
+        if 'instances' in state:
+            state['instances'] = []
+            state['_instance_ids'] = set()
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        self.__dict__.update(state)
+        if self.decorator_id is not None:
+            _decorators.setdefault(self.decorator_id, self)
+
+    def _register(self):
+        """Give the decorator a new stable id."""
+        self.decorator_id = '{}-{}'.format(self.__class__.__name__,
+                                           next(_decorator_counter))
+        _decorators[self.decorator_id] = self
 
     def flush_instances(self):
         """Flush instances."""
         self.instances = []
+        self._instance_ids = set()
+
+    def _add_instance(self, instance):
+        if '_instance_ids' not in self.__dict__:
+            # subclasses not calling `Decorator.__init__`
+            if 'instances' not in self.__dict__:
+                self.instances = []
+            self._instance_ids = set(id(obj) for obj in self.instances)
+        self._instance_ids.add(id(instance))
+        self.instances.append(instance)
+
+    def set_sampling(self, every=None, rate=None):
+        """Set sampling policy (disable sampling if no argument is given).
+
+        Parameters
+        ----------
+        every : int | None
+            Sample one call out of ``every``.
+        rate : float | None
+            Sample each call with probability ``rate``.
+
+        """
+        if every is not None and rate is not None:
+            raise ValueError('`every` and `rate` cannot be both set.')
+        if every is not None:
+            if not isinstance(every, int) or every < 1:
+                raise ValueError('`every` should be a positive integer.')
+            self.sampling = 'every' if every > 1 else None
+            self.sample_weight = every
+        elif rate is not None:
+            if not 0 < rate <= 1:
+                raise ValueError('`rate` should be in ]0, 1].')
+            self.sampling = 'rate' if rate < 1 else None
+            self.sample_weight = 1 / rate
+        else:
+            self.sampling = None
+            self.sample_weight = 1
+        self._sample_countdown = self._draw_sample_interval()
+
+    def set_overhead_budget(self, budget=.01, **kwargs):
+        """Automatically throttle the decorator to keep its overhead in budget.
+
+        The sampling rate is lowered when the overhead exceeds the budget and
+        raised back when headroom returns. If even a low rate exceeds the
+        budget, the decorator is bypassed (its activation states are left
+        untouched) and periodically used again to probe.
+
+        Parameters
+        ----------
+        budget : float | None
+            Maximum ratio between the decorator overhead and the decorated
+            method time (ex: ``.01`` for 1%). If None, remove the controller
+            and disable sampling.
+        **kwargs
+            Keyword arguments passed to :class:`OverheadController`.
+
+        """
+        if budget is None:
+            self.overhead_controller = None
+            self.set_sampling()
+        else:
+            self.overhead_controller = OverheadController(budget, **kwargs)
+
+    def _draw_sample_interval(self):
+        """Return the number of calls until the next sampled one.
+
+        In "rate" mode the interval follows a geometric distribution so that
+        the PRNG is only drawn once per sampled call.
+        """
+        if self.sampling == 'every':
+            return self.sample_weight
+        elif self.sampling == 'rate':
+            return 1 + int(math.log(1. - random.random()) /
+                           math.log(1. - 1 / self.sample_weight))
+        return 1
 
     @abstractmethod
     def wrapper(self, instance, func, *args, **kwargs):
         """Wrap func."""
         pass
 
-    def activate(self):
-        """Activate decorator for all methods of decorated instances."""
-        for instance in self.instances:
-            instance.activate_decorator(self.__class__.__name__)
-
-    def deactivate(self):
-        """Deactivate decorator for all methods of decorated instances."""
-        for instance in self.instances:
-            instance.deactivate_decorator(self.__class__.__name__)
-
-    def is_active(self, instance):
-        """Return True if decorator is active for input instance."""
-        if instance not in self.instances:
+    def metrics(self):
+        """Return statistics of the decorator as a list of metrics.
+
+        Override this method to expose statistics (see
+        :func:`pydeco.utils.openmetrics.render`).
+
+        Returns
+        -------
+        metrics : list of Metric
+            List of :class:`pydeco.utils.openmetrics.Metric` samples.
+        """
+        return []
+
+    def restore(self, snapshot, classname):
+        """Restore statistics of the decorator from a snapshot.
+
+        Override this method along with :meth:`metrics` to map metrics of a
+        :class:`pydeco.utils.Snapshot` back to decorator attributes.
+        Statistics are replaced by the ones of the decorators of the same type
+        decorating class `classname` in the snapshot.
+
+        Parameters
+        ----------
+        snapshot : Snapshot
+            Snapshot holding metrics of the decorator type.
+        classname : str
+            Name of the decorated class in the snapshot.
+        """
+        raise NotImplementedError('{} cannot be restored from a snapshot.'
+                                  .format(self.__class__.__name__))
+
+    @contextmanager
+    def override(self, active=True):
+        """Activate or deactivate the decorator in the current context only.
+
+        Within the ``with`` block, the decorator is active (or inactive) for
+        all decorated instances whatever their activation state, in the
+        current thread or asyncio task (and tasks it creates) only: other
+        threads and tasks are unaffected.
+
+        Parameters
+        ----------
+        active : bool
+            Whether the decorator is active within the context.
+
+        Examples
+        --------
+        >>> with tracer.override(active=True):
+        >>>     handle(request)
+
+        """
+        overrides = dict(_overrides.get() or ())
+        overrides[self] = active
+        token = _overrides.set(overrides)
+        try:
+            yield self
+        finally:
+            _overrides.reset(token)
+
+    def _next_stamp(self):
+        """Return a new activation stamp (larger than previous ones)."""
+        self._stamp += 1
+        return self._stamp
+
+    def _set_state(self, is_active, methods=None, cls=None):
+        if isinstance(methods, str):
+            methods = [methods]
+        for method in methods or []:
+            if method not in self._methods:
+                err = ('Decorator does not decorate method "{}". Decorated '
+                       'methods: {}'.format(method, sorted(self._methods)))
+                raise ValueError(err)
+        if cls is not None:
+            cls = wrapped_class(cls)
+        stamp = self._next_stamp()
+        if methods is None and cls is None:
+            # all other states are superseded
+            states = dict()
+        else:
+            states = dict(self._states)
+        for method in methods or [None]:
+            states[(cls, method)] = (stamp, is_active)
+        self._states = states
+
+    def _resolve_state(self, instance, method=None):
+        """Return the most recently set state applying to a method call."""
+        states = self._states
+        stamp, is_active = states[(None, None)]
+        if len(states) > 1:
+            cls = getattr(instance.__class__, '_Wrapper__wrapped_class',
+                          instance.__class__)
+            for key in ((None, method), (cls, None), (cls, method)):
+                state = states.get(key)
+                if state is not None and state[0] > stamp:
+                    stamp, is_active = state
+        # states set with `activate_decorator` or `deactivate_decorator`
+        instance_states = getattr(instance, '_decorator_states', None)
+        if instance_states:
+            name = self.__class__.__name__
+            for key in ((name, None), (name, method)):
+                state = instance_states.get(key)
+                if state is not None and state[0] > stamp:
+                    stamp, is_active = state
+        return is_active
+
+    def _is_active(self, instance, method=None):
+        """Return the activation state, with context overrides."""
+        overrides = _overrides.get()
+        if overrides is not None and self in overrides:
+            return overrides[self]
+        return self._resolve_state(instance, method)
+
+    def activate(self, methods=None, cls=None):
+        """Activate decorator for methods of decorated instances.
+
+        Runs in constant time: states are not stored on instances. Whatever
+        its scope, the most recently set state applying to a method call
+        wins (including per-instance states set with ``activate_decorator``
+        or ``deactivate_decorator``).
+
+        Parameters
+        ----------
+        methods : str | list of str | None
+            Decorated methods to activate the decorator for (all methods if
+            None).
+        cls : type | None
+            Decorated class (or original class) whose instances are affected
+            (instances of all classes if None).
+        """
+        self._set_state(True, methods=methods, cls=cls)
+
+    def deactivate(self, methods=None, cls=None):
+        """Deactivate decorator for methods of decorated instances.
+
+        Runs in constant time (see :meth:`activate`).
+
+        Parameters
+        ----------
+        methods : str | list of str | None
+            Decorated methods to deactivate the decorator for (all methods
+            if None).
+        cls : type | None
+            Decorated class (or original class) whose instances are affected
+            (instances of all classes if None).
+        """
+        self._set_state(False, methods=methods, cls=cls)
+
+    def is_active(self, instance, method=None):
+        """Return True if decorator is active for input instance (method)."""
+        if id(instance) not in self._instance_ids:
+            if self._disabled:
+                return False
             err = ('Current decorator does not decorate a method of input '
                    'class instance.')
             raise ValueError(err)
-        if not is_wrapped(instance):
-            return True
-        else:
-            class_name = self.__class__.__name__
-            # decorator not used in :class:`MethodsDecorator` context
-            if class_name not in instance.decorators:
-                return True
-            else:
-                return instance.is_decorator_active(class_name)
+        return self._is_active(instance, method)
 
     def __call__(self, func):
         """Call."""
+        self._methods = self._methods | {func.__name__}
+        if CONFIG.get('DISABLE'):
+            # decoration disabled: no overhead
+            self._disabled = True
+            return func
+
         def wrapped_func(instance, func, *args, **kwargs):
             """Call wrapper is decorator is active, otherwise call func."""
-            if instance not in self.instances:
-                self.instances.append(instance)
-
-            if self.is_active(instance):
-                # active decorator for the current func: wrap it
-                # check if input is a bound method or not
-                if hasattr(func, '__self__'):
-
-                    # wrap func as it is a bound method
-                    def func_(instance, *args, **kwargs):
-                        return func(*args, **kwargs)
-
-                    return self.wrapper(instance, func_, *args, **kwargs)
-                else:
-                    return self.wrapper(instance, func, *args, **kwargs)
-            else:
+            if id(instance) not in self._instance_ids:
+                self._add_instance(instance)
+
+            if self.sampling is not None:
+                self._sample_countdown -= 1
+                if self._sample_countdown > 0:
+                    # unsampled call: bypass wrapper
+                    return func(instance, *args, **kwargs)
+                self._sample_countdown = self._draw_sample_interval()
+
+            controller = self.overhead_controller
+            overrides = _overrides.get()
+            if overrides is not None and self in overrides:
+                # context-local activation
+                if not overrides[self]:
+                    return func(instance, *args, **kwargs)
+            elif not self._resolve_state(instance, func.__name__):
                 # inactive decorator for the current func
                 return func(instance, *args, **kwargs)
+            elif controller is not None and controller.throttled:
+                # decorator bypassed to keep its overhead within budget
+                controller.tick(self)
+                return func(instance, *args, **kwargs)
+
+            # active decorator for the current func: wrap it
+            if controller is not None:
+                return controller.call(self, instance, func, *args, **kwargs)
+            return self.wrapper(instance, func, *args, **kwargs)
 
         if hasattr(func, '__self__'):
             # input object is a method of an instance
             instance = func.__self__
 
+            # wrap func as it is a bound method
+            @wraps(func)
+            def func_(instance, *args, **kwargs):
+                return func(*args, **kwargs)
+
             @wraps(func)
             def _wrapped_func(*args, **kwargs):
-                return wrapped_func(instance, func, *args, **kwargs)
+                return wrapped_func(instance, func_, *args, **kwargs)
             return _wrapped_func
 
         else:
@@ -102,6 +430,35 @@ class Decorator(object):
             return _wrapped_func
 
 
+class _DisabledWrapper(object):
+    """Control API of classes decorated while decoration is disabled.
+
+    Methods are no-ops: decorated methods are the original ones.
+    """
+
+    @property
+    def decorators(self):
+        """Return decorators (none)."""
+        return dict()
+
+    @property
+    def active_decorators(self):
+        """Return decorators activation states (none)."""
+        return dict()
+
+    def is_decorator_active(self, name, method=None):
+        """Check if input decorator is active (always False)."""
+        return False
+
+    def activate_decorator(self, name, methods=None):
+        """Activate decorator (no-op)."""
+        pass
+
+    def deactivate_decorator(self, name, methods=None):
+        """Deactivate decorator (no-op)."""
+        pass
+
+
 class MethodsDecorator(object):
     """Class that enables to decorate specific methods with given decorator.
 
@@ -137,6 +494,12 @@ class MethodsDecorator(object):
     See the examples section for more insights on how to use
     :class:`MethodsDecorator`.
 
+    If ``CONFIG['DISABLE']`` is True (or the ``PYDECO_DISABLE`` environment
+    variable is set) when the class is decorated, the returned class is a
+    plain subclass with the original methods (registered and pickled like
+    wrapped classes) whose control API (``activate_decorator``, etc.) is a
+    no-op.
+
     """
 
     def __init__(self, mapping={}):
@@ -152,6 +515,24 @@ class MethodsDecorator(object):
 
     def __call__(self, cls):
         """Return wrapped input class with decorated methods."""
+        if CONFIG.get('DISABLE'):
+            for decorator, methods in self.mapping.items():
+                if isinstance(decorator, Decorator):
+                    decorator._disabled = True
+                    decorator._methods = decorator._methods | set(methods)
+
+            class DisabledWrapper(cls, _DisabledWrapper):
+                pass
+
+            DisabledWrapper.__name__ = make_wrapper_classname(cls.__name__)
+            # pickle the class by its registered name
+            DisabledWrapper.__qualname__ = DisabledWrapper.__name__
+            DisabledWrapper.__doc__ = cls.__doc__
+            # never handed out as a copy wrapper (see `register.assign`)
+            DisabledWrapper._Wrapper__assigned = True
+            register(DisabledWrapper)
+            return DisabledWrapper
+
         mapping = self.mapping
         original_methods = self.original_methods
 
@@ -199,9 +580,8 @@ class MethodsDecorator(object):
                 self._decorator_mapping = {
                     k: v for k, v in self.__decorator_mapping.items()
                 }
-                self.active_decorators = {
-                    decorator: True for decorator in self.decorators
-                }
+                # (stamp, is_active) by (decorator name, method or None)
+                self._decorator_states = dict()
                 self.__class__.__assigned = True
                 cls.__init__(self, *args, **kwargs)
 
@@ -213,21 +593,23 @@ class MethodsDecorator(object):
                     for decorator in self._decorator_mapping.keys()
                 }
 
+            @property
+            def active_decorators(self):
+                """Return decorators activation states (for all methods)."""
+                return {name: self.is_decorator_active(name)
+                        for name in self.decorators}
+
             def __deepcopy__(self, memo=None, _nil=[]):
                 """Deepcopy."""
                 # Remove decorators from self
                 cls_self = self.__class__
                 tmp_methods = dict()
                 tmp_mapping = dict()
-                tmp_active_decorators = dict()
 
                 for decorator, methods in self._decorator_mapping.items():
                     tmp_mapping[decorator] = methods
-                for decorator, is_active in self.active_decorators.items():
-                    tmp_active_decorators[decorator] = is_active
 
                 self._decorator_mapping = dict()
-                self.active_decorators = dict()
 
                 for method_name, method in self.__original_methods.items():
                     tmp_methods[method_name] = method
@@ -250,19 +632,12 @@ class MethodsDecorator(object):
                     setattr(cls_c_self, method_name, method)
 
                 for decorator, methods in tmp_mapping.items():
-                    decorator_name = decorator.__class__.__name__
                     c_decorator = deepcopy(decorator)
+                    if isinstance(c_decorator, Decorator):
+                        c_decorator._register()
                     self._decorator_mapping[decorator] = methods
                     c_self._decorator_mapping[c_decorator] = methods
 
-                    is_decorator_active = (
-                        tmp_active_decorators[decorator_name]
-                    )
-                    self.active_decorators[decorator_name] = (
-                        is_decorator_active)
-                    c_self.active_decorators[decorator_name] = (
-                        is_decorator_active)
-
                     for method_name in methods:
                         if not hasattr(self, method_name):
                             err = 'Input class has not method "{}"'.format(
@@ -278,9 +653,58 @@ class MethodsDecorator(object):
                         setattr(
                             cls_c_self, method_name,
                             c_decorator(getattr(cls_c_self, method_name)))
+                # methods of the copy's Wrapper are decorated by the copied
+                # decorators
+                cls_c_self.__decorator_mapping = dict(
+                    c_self._decorator_mapping)
                 # return copy
                 return c_self
 
+            def __getstate__(self):
+                """Return state, with decorators referenced by id.
+
+                Unless ``CONFIG['PICKLE_DECORATORS']`` is True, decorators
+                (and their statistics) are not pickled: the pickle size
+                overhead does not depend on the decorators usage.
+                """
+                state = self.__dict__.copy()
+                if not CONFIG.get('PICKLE_DECORATORS') and (
+                        '_decorator_mapping' in state):
+                    state['_decorator_mapping'] = [
+                        (getattr(decorator, 'decorator_id', None),
+                         decorator.__class__.__name__, methods)
+                        for decorator, methods in
+                        state['_decorator_mapping'].items()
+                    ]
+                return state
+
+            def __setstate__(self, state):
+                """Restore state, resolving decorators referenced by id.
+
+                A decorator whose id is unknown to the current process (ex:
+                a worker started with "spawn") is replaced by the decorator
+                of the same type decorating the class methods.
+                """
+                mapping = state.get('_decorator_mapping')
+                if isinstance(mapping, list):
+                    class_decorators = {
+                        decorator.__class__.__name__: decorator
+                        for decorator in self.__class__.__decorator_mapping
+                    }
+                    state['_decorator_mapping'] = dict()
+                    for decorator_id, name, methods in mapping:
+                        decorator = get_decorator(decorator_id)
+                        if decorator is None:
+                            decorator = class_decorators[name]
+                        state['_decorator_mapping'][decorator] = methods
+                self.__dict__.update(state)
+                # later states of local decorators should win
+                for (name, _), (stamp, _) in state.get(
+                        '_decorator_states', dict()).items():
+                    decorator = self.decorators.get(name)
+                    if isinstance(decorator, Decorator):
+                        decorator._stamp = max(decorator._stamp, stamp)
+
             def _check_decorator_name(self, name):
                 if name not in self.decorators:
                     err = ('Could not find decorator "{}". Available '
@@ -288,23 +712,60 @@ class MethodsDecorator(object):
                                name, list(self.decorators.keys())))
                     raise ValueError(err)
 
-            def is_decorator_active(self, name):
-                """Check if input decorator is active."""
+            def _check_decorator_methods(self, name, methods):
+                if methods is None:
+                    return None
+                if isinstance(methods, str):
+                    methods = [methods]
+                decorated = self._decorator_mapping[self.decorators[name]]
+                for method in methods:
+                    if method not in decorated:
+                        err = ('Decorator "{}" does not decorate method "{}".'
+                               ' Decorated methods: {}'.format(
+                                   name, method, list(decorated)))
+                        raise ValueError(err)
+                return methods
+
+            def is_decorator_active(self, name, method=None):
+                """Check if input decorator is active (for input method)."""
                 self._check_decorator_name(name)
-                return self.active_decorators[name]
-
-            def activate_decorator(self, name):
-                """Activate decorator."""
+                self._check_decorator_methods(
+                    name, None if method is None else [method])
+                decorator = self.decorators[name]
+                if not isinstance(decorator, Decorator):
+                    return self._decorator_states.get(
+                        (name, None), (0, True))[1]
+                return decorator._is_active(self, method)
+
+            def _set_decorator_state(self, name, is_active, methods=None):
                 self._check_decorator_name(name)
-                self.active_decorators[name] = True
+                methods = self._check_decorator_methods(name, methods)
+                decorator = self.decorators[name]
+                stamp = (decorator._next_stamp()
+                         if isinstance(decorator, Decorator) else 0)
+                if methods is None:
+                    # per-method states of the decorator are superseded
+                    states = {key: state for key, state in
+                              self._decorator_states.items()
+                              if key[0] != name}
+                else:
+                    states = dict(self._decorator_states)
+                for method in methods or [None]:
+                    states[(name, method)] = (stamp, is_active)
+                self._decorator_states = states
 
-            def deactivate_decorator(self, name):
-                """Deactivate decorator."""
-                self._check_decorator_name(name)
-                self.active_decorators[name] = False
+            def activate_decorator(self, name, methods=None):
+                """Activate decorator (for input methods only if set)."""
+                self._set_decorator_state(name, True, methods=methods)
+
+            def deactivate_decorator(self, name, methods=None):
+                """Deactivate decorator (for input methods only if set)."""
+                self._set_decorator_state(name, False, methods=methods)
 
         # Updating wrapped class name and documentation
         Wrapper.__name__ = make_wrapper_classname(cls.__name__)
+        # pickle the class by its registered name
+        Wrapper.__qualname__ = Wrapper.__name__
         Wrapper.__doc__ = cls.__doc__
 
         # Registering newly created Wrapper class
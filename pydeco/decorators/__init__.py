@@ -0,0 +1,12 @@
+"""Built-in decorators."""
+from .async_timer import AsyncTimer
+from .batching import AsyncBatcher, Batcher
+from .callgraph import CallGraphProfiler
+from .concurrency import AsyncConcurrencyLimiter, ConcurrencyLimiter
+from .events import CallEvent, EventEmitter
+from .memory import MemoryProfiler
+from .offload import Offload, get_pool, shutdown_pools
+from .scaling import ScalingProfiler, default_size
+from .slowest import SlowCall, SlowestCalls, summarize
+from .timer import Timer
+from .tracing import Tracer
@@ -0,0 +1,151 @@
+"""Asyncio-aware timer decorator."""
+import logging
+import types
+from inspect import isawaitable
+from time import perf_counter
+
+from ..decorator import Decorator
+from ..utils.openmetrics import Metric
+
+
+class AsyncTimer(Decorator):
+    """Decorator separating on-loop time from suspended time of coroutines.
+
+    The coroutine returned by a decorated ``async`` method is driven step by
+    step: time spent running between two suspensions is "on-loop" time (time
+    during which the event loop is blocked by the call), the rest of the wall
+    time is spent suspended at ``await``. Calls with a step longer than
+    ``block_threshold`` are flagged as blocking the loop. Synchronous methods
+    are timed as a single step.
+
+    Parameters
+    ----------
+    block_threshold : float
+        Duration (in s) of a single step above which a call is flagged as
+        blocking the event loop.
+    verbose : bool
+        If True, log a warning for each blocking call.
+
+    Attributes
+    ----------
+    run_by_func : dict
+        (Estimated) number of calls by method name.
+    runtime_by_func : dict
+        (Estimated) total wall time (in ms) by method name.
+    on_loop_runtime_by_func : dict
+        (Estimated) total on-loop time (in ms) by method name.
+    max_step_by_func : dict
+        Longest step (in ms) by method name.
+    blocking_by_func : dict
+        (Estimated) number of calls blocking the loop by method name.
+
+    """
+
+    probeable = False
+
+    def __init__(self, *args, block_threshold=.1, verbose=True, **kwargs):
+        self.block_threshold = block_threshold
+        self.verbose = verbose
+        self.run_by_func = dict()
+        self.runtime_by_func = dict()
+        self.on_loop_runtime_by_func = dict()
+        self.max_step_by_func = dict()
+        self.blocking_by_func = dict()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'AsyncTimer(run_by_func={}, blocking_by_func={})'.format(
+            self.run_by_func, self.blocking_by_func)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with on-loop time measurement."""
+        ts = perf_counter()
+        outs = func(instance, *args, **kwargs)
+        if isawaitable(outs):
+            return self._timed(outs, func.__name__)
+        runtime = perf_counter() - ts
+        self.record(func.__name__, runtime, runtime, runtime)
+        return outs
+
+    async def _timed(self, awaitable, name):
+        """Return a coroutine awaiting `awaitable` with step measurement."""
+        return await self._drive(awaitable, name)
+
+    @types.coroutine
+    def _drive(self, awaitable, name):
+        """Drive `awaitable` while measuring the duration of its steps."""
+        iterator = awaitable.__await__()
+        on_loop = max_step = 0.
+        value, error = None, None
+        start = perf_counter()
+        try:
+            while True:
+                ts = perf_counter()
+                try:
+                    if error is None:
+                        yielded = iterator.send(value)
+                    else:
+                        yielded = iterator.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    step = perf_counter() - ts
+                    on_loop += step
+                    max_step = max(max_step, step)
+                try:
+                    value, error = (yield yielded), None
+                except GeneratorExit:
+                    iterator.close()
+                    raise
+                except BaseException as exc:
+                    value, error = None, exc
+        finally:
+            self.record(name, perf_counter() - start, on_loop, max_step)
+
+    def record(self, name, runtime, on_loop, max_step):
+        """Record a call of method `name` (durations in s)."""
+        weight = self.sample_weight
+        self.run_by_func[name] = self.run_by_func.get(name, 0) + weight
+        self.runtime_by_func[name] = (
+            self.runtime_by_func.get(name, 0) + runtime * 1000 * weight)
+        self.on_loop_runtime_by_func[name] = (
+            self.on_loop_runtime_by_func.get(name, 0) +
+            on_loop * 1000 * weight)
+        if max_step * 1000 > self.max_step_by_func.get(name, 0):
+            self.max_step_by_func[name] = max_step * 1000
+        if max_step > self.block_threshold:
+            self.blocking_by_func[name] = (
+                self.blocking_by_func.get(name, 0) + weight)
+            if self.verbose:
+                logging.warning(
+                    '{!r} blocked the event loop for {:2.2f} ms'.format(
+                        name, max_step * 1000))
+
+    def split(self, name):
+        """Return wall, on-loop and suspended total times (in ms) of `name`."""
+        if name not in self.run_by_func:
+            raise ValueError('No call recorded for "{}".'.format(name))
+        wall = self.runtime_by_func[name]
+        on_loop = self.on_loop_runtime_by_func[name]
+        return wall, on_loop, max(wall - on_loop, 0)
+
+    def metrics(self):
+        """Return calls, wall, on-loop times and blocking calls by method."""
+        metrics = []
+        for name, run in list(self.run_by_func.items()):
+            metrics.append(Metric('calls', 'counter', 'Number of calls.',
+                                  name, run))
+        for name, runtime in list(self.runtime_by_func.items()):
+            metrics.append(Metric('runtime_seconds', 'counter',
+                                  'Total wall time of calls.', name,
+                                  runtime / 1000))
+        for name, runtime in list(self.on_loop_runtime_by_func.items()):
+            metrics.append(Metric('on_loop_seconds', 'counter',
+                                  'Total time spent running on the loop.',
+                                  name, runtime / 1000))
+        for name, run in list(self.blocking_by_func.items()):
+            metrics.append(Metric('blocking_calls', 'counter',
+                                  'Number of calls blocking the loop.',
+                                  name, run))
+        return metrics
@@ -0,0 +1,389 @@
+"""Micro-batching decorators coalescing concurrent calls."""
+import asyncio
+import threading
+from functools import partial
+from inspect import isawaitable
+from time import perf_counter
+
+from ..decorator import Decorator
+from ..utils.histogram import Histogram
+from ..utils.openmetrics import Metric
+
+
+def _check_outputs(outputs, size):
+    """Return outputs of a batched call as a list of `size` outputs."""
+    outputs = list(outputs)
+    if len(outputs) != size:
+        raise ValueError('Batched method returned {} outputs for {} inputs.'
+                         .format(len(outputs), size))
+    return outputs
+
+
+class _Batch(object):
+    """Inputs of coalesced calls and their outputs."""
+
+    __slots__ = ('inputs', 'times', 'full', 'done', 'outputs', 'error')
+
+    def __init__(self):
+        self.inputs = []
+        self.times = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.outputs = None
+        self.error = None
+
+
+class Batcher(Decorator):
+    """Decorator coalescing concurrent calls into calls of a batched method.
+
+    Calls of a decorated method with a single positional input (ex:
+    ``obj.predict(x)``) made by several threads on the same instance are
+    collected for up to ``max_delay`` seconds, or until ``max_batch_size``
+    calls are collected. The first caller of a batch then calls the batched
+    implementation once with the list of inputs and each caller gets its
+    output back (or the raised exception). Other calls run directly.
+
+    Parameters
+    ----------
+    batch_method : str | callable
+        Name of the batched method of decorated instances, or function called
+        as ``batch_method(instance, inputs)``. It takes the list of inputs and
+        returns a sequence of outputs of the same length (ex: stacking NumPy
+        arrays, calling the vectorized implementation and splitting the
+        result).
+    max_batch_size : int
+        Maximum number of calls in a batch.
+    max_delay : float
+        Maximum time (in s) the first call of a batch waits for other calls.
+
+    Attributes
+    ----------
+    run_by_func : dict
+        Number of batched calls by method name.
+    batch_by_func : dict
+        Number of batches by method name.
+    batch_size_by_func : dict
+        Histogram of batch sizes by method name.
+    batch_latency_by_func : dict
+        Histogram of durations (in ms) of batched calls by method name.
+    wait_by_func : dict
+        Histogram of times (in ms) calls wait before their batch starts, by
+        method name.
+
+    Examples
+    --------
+    >>> @MethodsDecorator(mapping={Batcher('predict_batch'): 'predict'})
+    >>> class Model():
+    >>>     def predict(self, x):
+    >>>         return self.predict_batch([x])[0]
+    >>>     def predict_batch(self, xs):
+    >>>         return list(self.net(np.stack(xs)))
+
+    """
+
+    # calls without arguments bypass batches
+    probeable = False
+
+    def __init__(self, batch_method, *args, max_batch_size=32,
+                 max_delay=.005, **kwargs):
+        if not isinstance(max_batch_size, int) or max_batch_size < 1:
+            raise ValueError('`max_batch_size` should be a positive integer.')
+        if max_delay < 0:
+            raise ValueError('`max_delay` should be non-negative.')
+        self.batch_method = batch_method
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.run_by_func = dict()
+        self.batch_by_func = dict()
+        self.batch_size_by_func = dict()
+        self.batch_latency_by_func = dict()
+        self.wait_by_func = dict()
+        # pending batch by (instance id, method name)
+        self._batches = dict()
+        self._lock = threading.Lock()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without pending batches and lock)."""
+        state = Decorator.__getstate__(self)
+        del state['_batches'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        Decorator.__setstate__(self, state)
+        self._batches = dict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'Batcher(run_by_func={}, batch_by_func={})'.format(
+            self.run_by_func, self.batch_by_func)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with call coalescing."""
+        if len(args) != 1 or kwargs:
+            return func(instance, *args, **kwargs)
+
+        key = (id(instance), func.__name__)
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = _Batch()
+            index = len(batch.inputs)
+            batch.inputs.append(args[0])
+            batch.times.append(perf_counter())
+            if index + 1 >= self.max_batch_size:
+                # close the batch
+                del self._batches[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self._run(instance, func.__name__, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.outputs[index]
+
+    def _run(self, instance, name, batch):
+        """Call the batched method on inputs of `batch`."""
+        if callable(self.batch_method):
+            batch_method = partial(self.batch_method, instance)
+        else:
+            batch_method = getattr(instance, self.batch_method)
+        ts = perf_counter()
+        try:
+            batch.outputs = _check_outputs(
+                batch_method(batch.inputs), len(batch.inputs))
+        except Exception as exc:
+            batch.error = exc
+        finally:
+            self.record(name, perf_counter() - ts,
+                        [ts - t for t in batch.times])
+            batch.done.set()
+
+    def record(self, name, latency, waits):
+        """Record a batch of method `name` (durations in s).
+
+        Parameters
+        ----------
+        name : str
+            Method name.
+        latency : float
+            Duration of the batched call.
+        waits : list of float
+            Time each call of the batch waited before the batched call.
+
+        """
+        with self._lock:
+            size = len(waits)
+            self.run_by_func[name] = self.run_by_func.get(name, 0) + size
+            self.batch_by_func[name] = self.batch_by_func.get(name, 0) + 1
+            if name not in self.batch_size_by_func:
+                self.batch_size_by_func[name] = Histogram()
+                self.batch_latency_by_func[name] = Histogram(resolution=1e-6)
+                self.wait_by_func[name] = Histogram(resolution=1e-6)
+            self.batch_size_by_func[name].record(size)
+            self.batch_latency_by_func[name].record(latency * 1000)
+            wait_histogram = self.wait_by_func[name]
+            for wait in waits:
+                wait_histogram.record(wait * 1000)
+
+    def metrics(self):
+        """Return batched calls, batch sizes, latencies and waits by method."""
+        metrics = []
+        for name, run in list(self.run_by_func.items()):
+            metrics.append(Metric('batched_calls', 'counter',
+                                  'Number of batched calls.', name, run))
+        for name, batches in list(self.batch_by_func.items()):
+            metrics.append(Metric('batches', 'counter',
+                                  'Number of batches.', name, batches))
+        for name, histogram in list(self.batch_size_by_func.items()):
+            metrics.append(Metric('batch_size', 'histogram',
+                                  'Number of calls by batch.', name,
+                                  histogram.copy()))
+        for name, histogram in list(self.batch_latency_by_func.items()):
+            metrics.append(Metric('batch_latency_seconds', 'histogram',
+                                  'Duration of batched calls.', name,
+                                  histogram.copy(scale=1e-3)))
+        for name, histogram in list(self.wait_by_func.items()):
+            metrics.append(Metric('batch_wait_seconds', 'histogram',
+                                  'Time calls wait for their batch.', name,
+                                  histogram.copy(scale=1e-3)))
+        return metrics
+
+    def restore(self, snapshot, classname):
+        """Restore batched calls, batches and histograms from `snapshot`.
+
+        See :meth:`pydeco.Decorator.restore`.
+        """
+        run_by_func, batch_by_func, batch_size_by_func = dict(), dict(), dict()
+        batch_latency_by_func, wait_by_func = dict(), dict()
+        values = snapshot.select(classname, self.__class__.__name__)
+        for (metric, name), value in values.items():
+            if metric == 'batched_calls':
+                run_by_func[name] = value
+            elif metric == 'batches':
+                batch_by_func[name] = value
+            elif metric == 'batch_size':
+                batch_size_by_func[name] = value
+            elif metric == 'batch_latency_seconds':
+                batch_latency_by_func[name] = value.copy(scale=1e3,
+                                                         resolution=1e-6)
+            elif metric == 'batch_wait_seconds':
+                wait_by_func[name] = value.copy(scale=1e3, resolution=1e-6)
+        with self._lock:
+            self.run_by_func = run_by_func
+            self.batch_by_func = batch_by_func
+            self.batch_size_by_func = batch_size_by_func
+            self.batch_latency_by_func = batch_latency_by_func
+            self.wait_by_func = wait_by_func
+
+
+class AsyncBatcher(Batcher):
+    """Decorator coalescing concurrent calls of coroutine methods.
+
+    Calls of a decorated ``async`` method with a single positional input
+    (ex: ``await obj.predict(x)``) are put in a bounded queue per instance
+    and method. A consumer task collects the calls made within the same event
+    loop iteration (and for up to ``max_delay`` seconds), until
+    ``max_batch_size`` calls, then awaits the batched implementation once and
+    resolves each call with its output (or the raised exception). The
+    consumer task stops once the queue is empty. Other calls run directly.
+
+    Parameters
+    ----------
+    batch_method : str | callable
+        Name of the batched method (coroutine or regular method) of decorated
+        instances, or function called as ``batch_method(instance, inputs)``.
+    max_batch_size : int
+        Maximum number of calls in a batch.
+    max_delay : float
+        Maximum time (in s) the consumer waits for other calls after the
+        first call of a batch (``0`` to only batch calls made within the same
+        event loop iteration).
+    max_queue_size : int
+        Maximum number of pending calls by instance and method: further calls
+        wait for room in the queue (backpressure).
+
+    Attributes
+    ----------
+    run_by_func : dict
+        Number of batched calls by method name.
+    batch_by_func : dict
+        Number of batches by method name.
+    batch_size_by_func : dict
+        Histogram of batch sizes by method name.
+    batch_latency_by_func : dict
+        Histogram of durations (in ms) of batched calls by method name.
+    wait_by_func : dict
+        Histogram of times (in ms) calls wait before their batch starts
+        (including time waiting for room in the queue), by method name.
+
+    """
+
+    def __init__(self, batch_method, *args, max_batch_size=32, max_delay=0.,
+                 max_queue_size=1024, **kwargs):
+        if not isinstance(max_queue_size, int) or max_queue_size < 1:
+            raise ValueError('`max_queue_size` should be a positive integer.')
+        self.max_queue_size = max_queue_size
+        Batcher.__init__(self, batch_method, *args,
+                         max_batch_size=max_batch_size, max_delay=max_delay,
+                         **kwargs)
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'AsyncBatcher(run_by_func={}, batch_by_func={})'.format(
+            self.run_by_func, self.batch_by_func)
+
+    def queue_depth(self, name):
+        """Return the number of pending calls of method `name`."""
+        return sum(queue.qsize() for (_, name_), (_, queue, _) in
+                   list(self._batches.items()) if name_ == name)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input coroutine method with call coalescing."""
+        if len(args) != 1 or kwargs:
+            return func(instance, *args, **kwargs)
+        return self._call(instance, func.__name__, args[0])
+
+    async def _call(self, instance, name, x):
+        """Queue a call and wait for its output."""
+        loop = asyncio.get_running_loop()
+        key = (id(instance), name)
+        # queues (and consumers) are bound to an event loop
+        state = self._batches.get(key)
+        if state is None or state[0] is not loop:
+            state = self._batches[key] = (
+                loop, asyncio.Queue(self.max_queue_size), [None])
+        _, queue, consumer = state
+
+        future = loop.create_future()
+        ts = perf_counter()
+        await queue.put((x, future, ts))
+        if consumer[0] is None or consumer[0].done():
+            consumer[0] = loop.create_task(
+                self._consume(instance, key, queue))
+        return await future
+
+    async def _consume(self, instance, key, queue):
+        """Run batches of queued calls until the queue is empty."""
+        name = key[1]
+        if callable(self.batch_method):
+            batch_method = partial(self.batch_method, instance)
+        else:
+            batch_method = getattr(instance, self.batch_method)
+        loop = asyncio.get_running_loop()
+        while not queue.empty():
+            items = [queue.get_nowait()]
+            deadline = loop.time() + self.max_delay
+            while len(items) < self.max_batch_size:
+                if not queue.empty():
+                    items.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            ts = perf_counter()
+            try:
+                outputs = batch_method([x for x, _, _ in items])
+                if isawaitable(outputs):
+                    outputs = await outputs
+                outputs = _check_outputs(outputs, len(items))
+            except Exception as exc:
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for (_, future, _), output in zip(items, outputs):
+                    if not future.done():
+                        future.set_result(output)
+            finally:
+                self.record(name, perf_counter() - ts,
+                            [ts - t for _, _, t in items])
+
+        # forget the idle queue
+        state = self._batches.get(key)
+        if state is not None and state[1] is queue:
+            del self._batches[key]
+
+    def metrics(self):
+        """Return batched calls, batch sizes, latencies, waits and depths."""
+        metrics = Batcher.metrics(self)
+        for name in set(name for _, name in list(self._batches)):
+            metrics.append(Metric('queue_depth', 'gauge',
+                                  'Number of pending calls.', name,
+                                  self.queue_depth(name)))
+        return metrics
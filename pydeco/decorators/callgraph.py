@@ -0,0 +1,147 @@
+"""Call graph profiler decorator."""
+import threading
+from time import perf_counter
+
+from ..decorator import Decorator
+from ..utils.openmetrics import Metric
+
+ROOT = '<root>'
+
+
+class CallGraphProfiler(Decorator):
+    """Decorator attributing self and cumulative time to decorated methods.
+
+    A per-thread stack of active decorated calls is maintained: when a
+    decorated call ends, its duration is subtracted from the self time of its
+    caller. As in :mod:`cProfile`, cumulative time of recursive calls is only
+    accounted for the outermost call.
+
+    Attributes
+    ----------
+    stats : dict
+        Mapping from method name to ``[calls, self_time, cumulative_time]``
+        (times in seconds).
+    edges : dict
+        Mapping from ``(caller, callee)`` names to ``[calls, time]``, where
+        `time` is the time spent in `callee` when called from `caller`. Calls
+        from undecorated code have ``'<root>'`` as caller.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.stats = dict()
+        self.edges = dict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without thread-local stacks and lock)."""
+        state = Decorator.__getstate__(self)
+        del state['_local'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        Decorator.__setstate__(self, state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'CallGraphProfiler(stats={})'.format(self.stats)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with call stack tracking."""
+        try:
+            stack = self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+        name = func.__qualname__
+        # frame: [name, start time, time spent in decorated callees]
+        frame = [name, perf_counter(), 0.]
+        stack.append(frame)
+        try:
+            return func(instance, *args, **kwargs)
+        finally:
+            elapsed = perf_counter() - frame[1]
+            stack.pop()
+            caller = stack[-1][0] if stack else ROOT
+            if stack:
+                stack[-1][2] += elapsed
+            recursive = any(f[0] == name for f in stack)
+            with self._lock:
+                stats = self.stats.get(name)
+                if stats is None:
+                    stats = self.stats[name] = [0, 0., 0.]
+                stats[0] += 1
+                stats[1] += elapsed - frame[2]
+                if not recursive:
+                    stats[2] += elapsed
+                edge = self.edges.get((caller, name))
+                if edge is None:
+                    edge = self.edges[(caller, name)] = [0, 0.]
+                edge[0] += 1
+                edge[1] += elapsed
+
+    def clear(self):
+        """Clear recorded statistics."""
+        with self._lock:
+            self.stats = dict()
+            self.edges = dict()
+
+    def metrics(self):
+        """Return calls, self and cumulative times by method."""
+        metrics = []
+        for name, (calls, self_time, cumulative_time) in list(
+                self.stats.items()):
+            metrics.extend([
+                Metric('calls', 'counter', 'Number of calls.', name, calls),
+                Metric('self_seconds', 'counter',
+                       'Time spent in calls outside of decorated callees.',
+                       name, self_time),
+                Metric('cumulative_seconds', 'counter',
+                       'Time spent in calls.', name, cumulative_time)])
+        return metrics
+
+    def call_graph(self):
+        """Return call graph as a dictionary.
+
+        Returns
+        -------
+        graph : dict
+            Dictionary with a ``'nodes'`` list (dicts with ``name``,
+            ``calls``, ``self_time`` and ``cumulative_time``) and an
+            ``'edges'`` list (dicts with ``caller``, ``callee``, ``calls``
+            and ``time``).
+
+        """
+        with self._lock:
+            nodes = [
+                {'name': name, 'calls': calls, 'self_time': self_time,
+                 'cumulative_time': cumulative_time}
+                for name, (calls, self_time, cumulative_time)
+                in self.stats.items()
+            ]
+            edges = [
+                {'caller': caller, 'callee': callee, 'calls': calls,
+                 'time': time}
+                for (caller, callee), (calls, time) in self.edges.items()
+            ]
+        return {'nodes': nodes, 'edges': edges}
+
+    def to_dot(self):
+        """Return call graph in the Graphviz DOT format."""
+        graph = self.call_graph()
+        lines = ['digraph pydeco {']
+        for node in graph['nodes']:
+            lines.append(
+                '    "{name}" [label="{name}\\n{calls} calls\\n'
+                'self {self_time:.6f} s\\ncum {cumulative_time:.6f} s"];'
+                .format(**node))
+        for edge in graph['edges']:
+            lines.append(
+                '    "{caller}" -> "{callee}" [label="{calls} calls\\n'
+                '{time:.6f} s"];'.format(**edge))
+        lines.append('}')
+        return '\n'.join(lines)
@@ -0,0 +1,318 @@
+"""Concurrency-limiting decorators with fair queueing."""
+import asyncio
+import threading
+from collections import deque
+from time import perf_counter
+
+from ..decorator import Decorator
+from ..utils.histogram import Histogram
+from ..utils.openmetrics import Metric
+
+
+class _FairSemaphore(object):
+    """Semaphore handing released slots to waiting threads in FIFO order."""
+
+    def __init__(self, value):
+        self.value = value
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self, blocking=True):
+        with self.lock:
+            if self.value > 0 and not self.waiters:
+                self.value -= 1
+                return True
+            if not blocking:
+                return False
+            waiter = threading.Lock()
+            waiter.acquire()
+            self.waiters.append(waiter)
+        # released by `release` handing its slot over
+        waiter.acquire()
+        return True
+
+    def release(self):
+        with self.lock:
+            if self.waiters:
+                self.waiters.popleft().release()
+            else:
+                self.value += 1
+
+
+class _AsyncFairSemaphore(object):
+    """Semaphore handing released slots to waiting tasks in FIFO order."""
+
+    def __init__(self, value):
+        self.value = value
+        self.waiters = deque()
+
+    def acquire_nowait(self):
+        if self.value > 0 and not self.waiters:
+            self.value -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        if self.acquire_nowait():
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # a slot was handed over: pass it on
+                self.release()
+            elif future in self.waiters:
+                self.waiters.remove(future)
+            raise
+        return True
+
+    def release(self):
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.value += 1
+
+
+class ConcurrencyLimiter(Decorator):
+    """Decorator capping the number of in-flight calls of decorated methods.
+
+    Calls exceeding the cap wait in a first-in first-out queue: a slot
+    released by a finishing call is handed over to the longest waiting call.
+    Queue waits and depths are recorded to tune the cap for throughput.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Maximum number of in-flight calls.
+    scope : str
+        ``'method'`` to cap calls of each decorated method (whatever the
+        instance) or ``'instance'`` to cap calls of decorated methods of each
+        instance.
+
+    Attributes
+    ----------
+    run_by_func : dict
+        (Estimated) number of calls by method name.
+    wait_by_func : dict
+        Histogram of queue wait times (in ms) by method name.
+    depth_by_func : dict
+        Number of calls currently waiting by method name.
+    max_depth_by_func : dict
+        Maximum number of calls waiting at once by method name.
+    in_flight_by_func : dict
+        Number of calls currently running by method name.
+
+    """
+
+    _semaphore_class = _FairSemaphore
+
+    def __init__(self, max_concurrency, *args, scope='method', **kwargs):
+        if not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise ValueError('`max_concurrency` should be a positive '
+                             'integer.')
+        if scope not in ('method', 'instance'):
+            raise ValueError('`scope` should be "method" or "instance".')
+        self.max_concurrency = max_concurrency
+        self.scope = scope
+        self.run_by_func = dict()
+        self.wait_by_func = dict()
+        self.depth_by_func = dict()
+        self.max_depth_by_func = dict()
+        self.in_flight_by_func = dict()
+        # semaphores by method name or instance id, and number of current
+        # calls by instance id (idle semaphores of instances are dropped)
+        self._semaphores = dict()
+        self._users = dict()
+        self._lock = threading.Lock()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without semaphores, lock and current calls)."""
+        state = Decorator.__getstate__(self)
+        del state['_semaphores'], state['_users'], state['_lock']
+        state['depth_by_func'] = dict()
+        state['in_flight_by_func'] = dict()
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        Decorator.__setstate__(self, state)
+        self._semaphores = dict()
+        self._users = dict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return '{}(max_concurrency={}, max_depth_by_func={})'.format(
+            self.__class__.__name__, self.max_concurrency,
+            self.max_depth_by_func)
+
+    def _semaphore(self, instance, name):
+        """Return the semaphore of the call scope (see :meth:`_leave`)."""
+        if self.scope == 'method':
+            semaphore = self._semaphores.get(name)
+            if semaphore is None:
+                with self._lock:
+                    semaphore = self._semaphores.get(name)
+                    if semaphore is None:
+                        semaphore = self._semaphores[name] = (
+                            self._semaphore_class(self.max_concurrency))
+            return semaphore
+        key = id(instance)
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = self._semaphores[key] = (
+                    self._semaphore_class(self.max_concurrency))
+            self._users[key] = self._users.get(key, 0) + 1
+        return semaphore
+
+    def _leave(self, instance):
+        """Drop the semaphore of `instance` if no call is using it."""
+        if self.scope == 'method':
+            return
+        key = id(instance)
+        with self._lock:
+            users = self._users[key] - 1
+            if users:
+                self._users[key] = users
+            else:
+                del self._users[key], self._semaphores[key]
+
+    def _enqueue(self, name, delta):
+        """Update the number of waiting calls of method `name`."""
+        with self._lock:
+            depth = self.depth_by_func.get(name, 0) + delta
+            self.depth_by_func[name] = depth
+            if depth > self.max_depth_by_func.get(name, 0):
+                self.max_depth_by_func[name] = depth
+
+    def record(self, name, wait, delta=1):
+        """Record the start (or end) of a call of `name` after `wait` s."""
+        with self._lock:
+            self.in_flight_by_func[name] = (
+                self.in_flight_by_func.get(name, 0) + delta)
+            if delta < 0:
+                return
+            self.run_by_func[name] = (
+                self.run_by_func.get(name, 0) + self.sample_weight)
+            histogram = self.wait_by_func.get(name)
+            if histogram is None:
+                histogram = self.wait_by_func[name] = Histogram(
+                    resolution=1e-6)
+            histogram.record(wait * 1000)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with a concurrency cap."""
+        name = func.__name__
+        semaphore = self._semaphore(instance, name)
+        try:
+            ts = perf_counter()
+            if not semaphore.acquire(blocking=False):
+                self._enqueue(name, 1)
+                try:
+                    semaphore.acquire()
+                finally:
+                    self._enqueue(name, -1)
+            self.record(name, perf_counter() - ts)
+            try:
+                return func(instance, *args, **kwargs)
+            finally:
+                self.record(name, 0, delta=-1)
+                semaphore.release()
+        finally:
+            self._leave(instance)
+
+    def metrics(self):
+        """Return calls, queue waits, queue depths and in-flight calls."""
+        metrics = []
+        for name, run in list(self.run_by_func.items()):
+            metrics.append(Metric('limited_calls', 'counter',
+                                  'Number of calls.', name, run))
+        for name, histogram in list(self.wait_by_func.items()):
+            metrics.append(Metric('queue_wait_seconds', 'histogram',
+                                  'Time calls wait for a slot.', name,
+                                  histogram.copy(scale=1e-3)))
+        for name, depth in list(self.depth_by_func.items()):
+            metrics.append(Metric('queue_depth', 'gauge',
+                                  'Number of calls waiting for a slot.',
+                                  name, depth))
+        for name, depth in list(self.max_depth_by_func.items()):
+            metrics.append(Metric('max_queue_depth', 'gauge',
+                                  'Maximum number of calls waiting at once.',
+                                  name, depth))
+        for name, in_flight in list(self.in_flight_by_func.items()):
+            metrics.append(Metric('in_flight_calls', 'gauge',
+                                  'Number of running calls.', name,
+                                  in_flight))
+        return metrics
+
+    def restore(self, snapshot, classname):
+        """Restore calls, queue waits and maximum depths from `snapshot`.
+
+        Current depths and in-flight calls are not restored (see
+        :meth:`pydeco.Decorator.restore`).
+        """
+        run_by_func, wait_by_func, max_depth_by_func = dict(), dict(), dict()
+        values = snapshot.select(classname, self.__class__.__name__)
+        for (metric, name), value in values.items():
+            if metric == 'limited_calls':
+                run_by_func[name] = value
+            elif metric == 'queue_wait_seconds':
+                wait_by_func[name] = value.copy(scale=1e3, resolution=1e-6)
+            elif metric == 'max_queue_depth':
+                max_depth_by_func[name] = value
+        with self._lock:
+            self.run_by_func = run_by_func
+            self.wait_by_func = wait_by_func
+            self.max_depth_by_func = max_depth_by_func
+
+
+class AsyncConcurrencyLimiter(ConcurrencyLimiter):
+    """Decorator capping the number of in-flight calls of coroutine methods.
+
+    Asyncio version of :class:`ConcurrencyLimiter`: calls exceeding the cap
+    are suspended (without blocking the event loop) in a first-in first-out
+    queue. Semaphores should only be used from a single event loop.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Maximum number of in-flight calls.
+    scope : str
+        ``'method'`` to cap calls of each decorated method (whatever the
+        instance) or ``'instance'`` to cap calls of decorated methods of each
+        instance.
+
+    """
+
+    _semaphore_class = _AsyncFairSemaphore
+    probeable = False
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input coroutine method with a concurrency cap."""
+        return self._call(instance, func, *args, **kwargs)
+
+    async def _call(self, instance, func, *args, **kwargs):
+        name = func.__name__
+        semaphore = self._semaphore(instance, name)
+        try:
+            ts = perf_counter()
+            if not semaphore.acquire_nowait():
+                self._enqueue(name, 1)
+                try:
+                    await semaphore.acquire()
+                finally:
+                    self._enqueue(name, -1)
+            self.record(name, perf_counter() - ts)
+            try:
+                return await func(instance, *args, **kwargs)
+            finally:
+                self.record(name, 0, delta=-1)
+                semaphore.release()
+        finally:
+            self._leave(instance)
@@ -0,0 +1,121 @@
+"""Event emitter decorator."""
+import logging
+from collections import deque, namedtuple
+from threading import get_ident
+from time import perf_counter
+
+from ..decorator import Decorator
+
+CallEvent = namedtuple('CallEvent', ['kind', 'method', 'instance_id',
+                                     'thread_id', 'timestamp', 'duration',
+                                     'exception'])
+CallEvent.__doc__ = """Event emitted by :class:`EventEmitter`.
+
+Parameters
+----------
+kind : str
+    One of ``'start'``, ``'end'`` or ``'exception'``.
+method : str
+    Name of the called method.
+instance_id : int
+    Id of the instance the method is called on.
+thread_id : int
+    Identifier of the calling thread.
+timestamp : float
+    Time (from :func:`time.perf_counter`) at which the event occurred.
+duration : float | None
+    Duration of the call in seconds (None for ``'start'`` events).
+exception : BaseException | None
+    Exception raised by the call (for ``'exception'`` events only).
+"""
+
+
+class EventEmitter(Decorator):
+    """Decorator emitting call start/end/exception events to subscribers.
+
+    Events are buffered and dispatched to subscribers by batches of
+    ``batch_size`` events. When nobody is subscribed, decorated methods are
+    called directly and no event is built. Exceptions raised by subscribers
+    are logged and do not propagate: they never change what decorated
+    methods return or raise.
+
+    Parameters
+    ----------
+    batch_size : int
+        Number of buffered events triggering a dispatch to subscribers.
+
+    Examples
+    --------
+    >>> emitter = EventEmitter(batch_size=100)
+    >>> @emitter.subscribe
+    >>> def on_events(events):
+    >>>     for event in events:
+    >>>         print(event.kind, event.method, event.duration)
+
+    """
+
+    def __init__(self, *args, batch_size=64, **kwargs):
+        if batch_size < 1:
+            raise ValueError('`batch_size` should be a positive integer.')
+        self.batch_size = batch_size
+        self.subscribers = []
+        self._events = deque()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def subscribe(self, callback):
+        """Subscribe `callback`, called with lists of :class:`CallEvent`."""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Unsubscribe `callback` after dispatching pending events."""
+        self.flush()
+        self.subscribers.remove(callback)
+
+    def emit(self, event):
+        """Buffer `event` and dispatch buffered events if batch is full."""
+        self._events.append(event)
+        if len(self._events) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Dispatch buffered events to subscribers."""
+        events = self._events
+        batch = []
+        try:
+            for _ in range(len(events)):
+                batch.append(events.popleft())
+        except IndexError:
+            # events concurrently flushed by another thread
+            pass
+        if batch:
+            for callback in list(self.subscribers):
+                try:
+                    callback(batch)
+                except Exception:
+                    logging.exception('Subscriber {!r} of {!r} failed.'.format(
+                        callback, self))
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with event emission."""
+        if not self.subscribers:
+            return func(instance, *args, **kwargs)
+
+        name = func.__name__
+        instance_id = id(instance)
+        thread_id = get_ident()
+        ts = perf_counter()
+        self.emit(CallEvent('start', name, instance_id, thread_id, ts, None,
+                            None))
+        try:
+            outs = func(instance, *args, **kwargs)
+        except BaseException as exc:
+            te = perf_counter()
+            self.emit(CallEvent('exception', name, instance_id, thread_id, te,
+                                te - ts, exc))
+            raise
+        te = perf_counter()
+        self.emit(CallEvent('end', name, instance_id, thread_id, te, te - ts,
+                            None))
+        return outs
@@ -0,0 +1,196 @@
+"""Memory profiler decorator."""
+import threading
+import tracemalloc
+
+from ..decorator import Decorator
+from ..utils.openmetrics import Metric
+
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)  # Python >= 3.9
+
+# decorated calls in flight (tracemalloc counters are process-wide): thread
+# whose calls are measured, numbers of measured and unmeasured calls, and
+# total number of unmeasured calls
+_calls = {'owner': None, 'measured': 0, 'unmeasured': 0, 'skipped': 0}
+_calls_lock = threading.Lock()
+
+
+def _acquire():
+    """Return True if the call starting in the current thread is measured."""
+    ident = threading.get_ident()
+    with _calls_lock:
+        if _calls['unmeasured'] == 0 and _calls['owner'] in (None, ident):
+            _calls['owner'] = ident
+            _calls['measured'] += 1
+            return True
+        _calls['unmeasured'] += 1
+        _calls['skipped'] += 1
+        return False
+
+
+def _release(measured):
+    with _calls_lock:
+        if not measured:
+            _calls['unmeasured'] -= 1
+            return
+        _calls['measured'] -= 1
+        if _calls['measured'] == 0:
+            _calls['owner'] = None
+
+
+class MemoryProfiler(Decorator):
+    """Decorator measuring memory allocated by decorated methods.
+
+    Allocations are measured with :mod:`tracemalloc`, which has to be started
+    (ex: with :func:`tracemalloc.start` or the ``PYTHONTRACEMALLOC``
+    environment variable): when it is not tracing, decorated methods are
+    called directly. Use ``sample_every`` or ``sample_rate`` (see
+    :class:`pydeco.Decorator`) to keep overhead down; allocated bytes are then
+    estimates.
+
+    As :mod:`tracemalloc` counters (and peak resets) are process-wide, calls
+    are only measured when no decorated call runs in another thread: calls
+    overlapping with calls of other threads are not recorded (see
+    ``skipped_by_func``). Allocations of threads running undecorated code
+    are still charged to the decorated calls in flight.
+
+    Attributes
+    ----------
+    run_by_func : dict
+        (Estimated) number of calls by method name.
+    allocated_by_func : dict
+        (Estimated) net allocated bytes by method name (memory still allocated
+        when calls return).
+    peak_by_func : dict
+        Largest peak of allocated bytes during a call by method name (relative
+        to allocated memory at the start of the call). Peaks are only
+        measured on Python >= 3.9.
+    skipped_by_func : dict
+        (Estimated) number of calls not recorded because they overlapped
+        with decorated calls of other threads, by method name.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.run_by_func = dict()
+        self.allocated_by_func = dict()
+        self.peak_by_func = dict()
+        self.skipped_by_func = dict()
+        self._local = threading.local()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without thread-local stacks)."""
+        state = Decorator.__getstate__(self)
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        Decorator.__setstate__(self, state)
+        self._local = threading.local()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'MemoryProfiler(allocated_by_func={}, peak_by_func={})'.format(
+            self.allocated_by_func, self.peak_by_func)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with memory measurement."""
+        if not tracemalloc.is_tracing():
+            return func(instance, *args, **kwargs)
+        measured = _acquire()
+        try:
+            if not measured:
+                self._skip(func.__name__)
+                return func(instance, *args, **kwargs)
+            return self._measure(instance, func, *args, **kwargs)
+        finally:
+            _release(measured)
+
+    def _measure(self, instance, func, *args, **kwargs):
+        """Call input instance method and record its allocations."""
+        try:
+            stack = self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if _reset_peak is not None:
+            if stack:
+                # keep the caller peak before resetting it
+                stack[-1][1] = max(stack[-1][1], peak)
+            _reset_peak()
+        # frame: [allocated memory at start, peak of nested calls]
+        frame = [current, current]
+        stack.append(frame)
+        skipped = _calls['skipped']
+        try:
+            return func(instance, *args, **kwargs)
+        finally:
+            stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame[1]) if _reset_peak is not None else None
+            if stack and peak is not None:
+                stack[-1][1] = max(stack[-1][1], peak)
+            if _calls['skipped'] != skipped:
+                # other threads allocated meanwhile
+                self._skip(func.__name__)
+            else:
+                self.record(func.__name__, current - frame[0],
+                            None if peak is None else peak - frame[0])
+
+    def _skip(self, name):
+        self.skipped_by_func[name] = (
+            self.skipped_by_func.get(name, 0) + self.sample_weight)
+
+    def record(self, name, allocated, peak=None):
+        """Record a measured call of method `name`."""
+        weight = self.sample_weight
+        self.run_by_func[name] = self.run_by_func.get(name, 0) + weight
+        self.allocated_by_func[name] = (
+            self.allocated_by_func.get(name, 0) + allocated * weight)
+        if peak is not None and peak > self.peak_by_func.get(name, 0):
+            self.peak_by_func[name] = peak
+
+    def metrics(self):
+        """Return calls, allocated bytes and peaks by method."""
+        metrics = []
+        for name, run in list(self.run_by_func.items()):
+            metrics.append(Metric('calls', 'counter', 'Number of calls.',
+                                  name, run))
+        for name, allocated in list(self.allocated_by_func.items()):
+            metrics.append(Metric('allocated_bytes', 'counter',
+                                  'Net allocated bytes.', name, allocated))
+        for name, peak in list(self.peak_by_func.items()):
+            metrics.append(Metric('peak_bytes', 'gauge',
+                                  'Largest allocation peak of a call.', name,
+                                  peak))
+        for name, skipped in list(self.skipped_by_func.items()):
+            metrics.append(Metric('skipped_calls', 'counter',
+                                  'Number of calls not measured.', name,
+                                  skipped))
+        return metrics
+
+    def top(self, n=10, key='allocated'):
+        """Return the `n` methods allocating the most memory.
+
+        Parameters
+        ----------
+        n : int
+            Number of methods to return.
+        key : str
+            Sort by net allocated bytes (``'allocated'``) or by peak
+            (``'peak'``).
+
+        Returns
+        -------
+        top : list of tuple
+            List of (method name, allocated bytes, peak bytes) tuples.
+
+        """
+        if key not in ('allocated', 'peak'):
+            raise ValueError('`key` should be "allocated" or "peak".')
+        rows = [(name, allocated, self.peak_by_func.get(name))
+                for name, allocated in self.allocated_by_func.items()]
+        index = 1 if key == 'allocated' else 2
+        rows.sort(key=lambda row: row[index] or 0, reverse=True)
+        return rows[:n]
@@ -0,0 +1,205 @@
+"""Offload decorator running methods on a shared thread or process pool."""
+import asyncio
+import atexit
+import os
+import threading
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from copy import deepcopy
+
+from ..decorator import Decorator, get_decorator
+from ..utils.openmetrics import Metric
+
+# shared pools by (kind, max_workers)
+_pools = dict()
+_pools_lock = threading.Lock()
+
+
+def get_pool(kind='thread', max_workers=None):
+    """Return the shared pool of input kind and size (created if needed).
+
+    Parameters
+    ----------
+    kind : str
+        Pool kind: ``'thread'`` or ``'process'``.
+    max_workers : int | None
+        Maximum number of workers (executor default if None).
+
+    Returns
+    -------
+    pool : Executor
+        Shared pool.
+    """
+    if kind not in ('thread', 'process'):
+        raise ValueError('`kind` should be "thread" or "process".')
+    key = (kind, max_workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if kind == 'thread':
+                pool = ThreadPoolExecutor(max_workers,
+                                          thread_name_prefix='pydeco')
+            else:
+                pool = ProcessPoolExecutor(max_workers)
+            _pools[key] = pool
+    return pool
+
+
+def shutdown_pools(wait=True):
+    """Shut down shared pools (new pools are created on the next call)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+def _forget_pools():
+    # pools of the parent process are not usable in forked children
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+atexit.register(shutdown_pools)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+def _run_offloaded(decorator_id, name, instance, args, kwargs):
+    """Run method `name` of `instance` below the :class:`Offload` decorator.
+
+    The decorator is resolved by id, or among the decorators of the instance
+    class if the id is unknown to the current process.
+    """
+    decorator = get_decorator(decorator_id)
+    if decorator is None or name not in decorator._funcs:
+        mapping = getattr(instance.__class__, '_Wrapper__decorator_mapping',
+                          dict())
+        for candidate in mapping:
+            if isinstance(candidate, Offload) and name in candidate._funcs:
+                decorator = candidate
+                break
+        else:
+            raise ValueError('Could not find the offloaded method "{}" in the '
+                             'current process.'.format(name))
+    return decorator._funcs[name](instance, *args, **kwargs)
+
+
+class Offload(Decorator):
+    """Decorator running decorated methods on a thread or process pool.
+
+    Decorated calls return a :class:`concurrent.futures.Future` of the
+    method outputs, or an awaitable :class:`asyncio.Future` when called from
+    a running event loop. Calls made while the decorator is inactive run on
+    the calling thread and return outputs directly.
+
+    Pools are shared by all decorators with the same ``executor`` and
+    ``max_workers`` (see :func:`get_pool`), shut down at exit or by
+    :func:`shutdown_pools`.
+
+    Parameters
+    ----------
+    executor : str | Executor
+        ``'thread'``, ``'process'`` or an executor managed by the caller.
+    max_workers : int | None
+        Maximum number of workers of the shared pool.
+
+    Attributes
+    ----------
+    run_by_func : dict
+        (Estimated) number of offloaded calls by method name.
+
+    Notes
+    -----
+    With process pools, the instance and the inputs are pickled for each
+    call (decorators are pickled by id, see :class:`pydeco.MethodsDecorator`)
+    and the method runs on a copy of the instance in the worker: outputs are
+    returned but changes to the instance are lost. Methods must be decorated
+    in a class defined at import time, or through a
+    :class:`pydeco.utils.WorkerContext` pool.
+
+    Deep copies of the decorator (ex: of decorated instances) share its
+    caller-managed executor. Executors cannot be pickled: unpickled copies
+    (ex: in other processes) run methods on the shared thread pool.
+
+    Examples
+    --------
+    >>> @MethodsDecorator(mapping={Offload('process'): 'fit'})
+    >>> class MyClass():
+    >>>     ...
+    >>> future = MyClass().fit(X)
+    >>> model = future.result()
+
+    """
+
+    def __init__(self, executor='thread', *args, max_workers=None, **kwargs):
+        if not isinstance(executor, Executor) and executor not in (
+                'thread', 'process'):
+            raise ValueError('`executor` should be "thread", "process" or an '
+                             'Executor.')
+        self.executor = executor
+        self.max_workers = max_workers
+        self.run_by_func = dict()
+        # undecorated methods by qualified name
+        self._funcs = dict()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without executor nor methods)."""
+        state = Decorator.__getstate__(self)
+        if isinstance(state['executor'], Executor):
+            state['executor'] = 'thread'
+        state['_funcs'] = dict()
+        return state
+
+    def __deepcopy__(self, memo):
+        """Return a deep copy sharing the caller-managed executor."""
+        c_decorator = self.__class__.__new__(self.__class__)
+        memo[id(self)] = c_decorator
+        state = self.__getstate__()
+        state['executor'] = None
+        state = deepcopy(state, memo)
+        state['executor'] = self.executor
+        c_decorator.__setstate__(state)
+        return c_decorator
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'Offload(executor={!r}, run_by_func={})'.format(
+            self.executor, self.run_by_func)
+
+    def __call__(self, func):
+        """Call."""
+        self._funcs[func.__qualname__] = getattr(func, '__func__', func)
+        return Decorator.__call__(self, func)
+
+    @property
+    def pool(self):
+        """Return the executor running decorated methods."""
+        if isinstance(self.executor, Executor):
+            return self.executor
+        return get_pool(self.executor, self.max_workers)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Submit input instance method to the pool and return a future."""
+        name = func.__qualname__
+        self.run_by_func[name] = (
+            self.run_by_func.get(name, 0) + self.sample_weight)
+        pool = self.pool
+        if isinstance(pool, ProcessPoolExecutor):
+            future = pool.submit(_run_offloaded, self.decorator_id, name,
+                                 instance, args, kwargs)
+        else:
+            future = pool.submit(func, instance, *args, **kwargs)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return future
+        return asyncio.wrap_future(future, loop=loop)
+
+    def metrics(self):
+        """Return offloaded calls by method."""
+        return [Metric('offloaded_calls', 'counter',
+                       'Number of calls run on a pool.', name, run)
+                for name, run in list(self.run_by_func.items())]
@@ -0,0 +1,128 @@
+"""Scaling profiler decorator."""
+import math
+from array import array
+from time import perf_counter
+
+from ..decorator import Decorator
+
+N_BUCKETS = 64
+
+
+def default_size(*args, **kwargs):
+    """Return size of the first sized argument (None if there is none).
+
+    The size is the ``size`` attribute of array-like objects (ex: NumPy
+    arrays), the number of bytes of bytes-like objects and the length of
+    other sized objects.
+    """
+    for arg in args + tuple(kwargs.values()):
+        size = getattr(arg, 'size', None)
+        if isinstance(size, int):
+            return size
+        if isinstance(arg, memoryview):
+            return arg.nbytes
+        try:
+            return len(arg)
+        except TypeError:
+            continue
+    return None
+
+
+class ScalingProfiler(Decorator):
+    """Decorator measuring how decorated methods scale with input size.
+
+    Call durations are accumulated in power-of-two buckets of input size
+    (stored in fixed-size arrays, not per call), from which an empirical
+    growth exponent (``time ~ size ** exponent``) is fitted.
+
+    Parameters
+    ----------
+    size : callable | None
+        Function called with the method arguments (without the instance) and
+        returning the input size, or None to skip the call. Defaults to
+        :func:`default_size`.
+
+    Attributes
+    ----------
+    buckets : dict
+        Mapping from method name to ``(counts, sizes, times)`` arrays where
+        bucket ``i`` accumulates calls with a size of bit length ``i``.
+
+    """
+
+    # calls without arguments have no size
+    probeable = False
+
+    def __init__(self, *args, size=None, **kwargs):
+        self.size = default_size if size is None else size
+        self.buckets = dict()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'ScalingProfiler(methods={})'.format(sorted(self.buckets))
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with duration measurement."""
+        size = self.size(*args, **kwargs)
+        if size is None:
+            return func(instance, *args, **kwargs)
+
+        ts = perf_counter()
+        outs = func(instance, *args, **kwargs)
+        duration = perf_counter() - ts
+
+        buckets = self.buckets.get(func.__name__)
+        if buckets is None:
+            buckets = self.buckets[func.__name__] = (
+                array('Q', bytes(8 * N_BUCKETS)),
+                array('d', bytes(8 * N_BUCKETS)),
+                array('d', bytes(8 * N_BUCKETS)))
+        index = min(int(size).bit_length(), N_BUCKETS - 1)
+        buckets[0][index] += 1
+        buckets[1][index] += size
+        buckets[2][index] += duration
+        return outs
+
+    def scaling(self, name):
+        """Return empirical scaling of method `name`.
+
+        Returns
+        -------
+        scaling : dict
+            Dictionary with:
+
+            - ``'buckets'``: list of (mean size, calls, mean duration) tuples
+              of non-empty buckets,
+            - ``'time_per_element'``: total duration over total size,
+            - ``'exponent'``: growth exponent fitted by weighted least squares
+              in log-log space (None with less than two distinct sizes).
+
+        """
+        if name not in self.buckets:
+            raise ValueError('No call recorded for "{}".'.format(name))
+        counts, sizes, times = self.buckets[name]
+        buckets = [(sizes[i] / counts[i], counts[i], times[i] / counts[i])
+                   for i in range(N_BUCKETS) if counts[i]]
+        total_size = sum(sizes)
+        time_per_element = sum(times) / total_size if total_size else None
+
+        # weighted least squares of log(duration) on log(size)
+        points = [(math.log(size), math.log(duration), count)
+                  for size, count, duration in buckets
+                  if size > 0 and duration > 0]
+        exponent = None
+        if len(points) >= 2:
+            weight = sum(w for _, _, w in points)
+            mean_x = sum(x * w for x, _, w in points) / weight
+            mean_y = sum(y * w for _, y, w in points) / weight
+            var = sum(w * (x - mean_x) ** 2 for x, _, w in points)
+            cov = sum(w * (x - mean_x) * (y - mean_y) for x, y, w in points)
+            if var > 0:
+                exponent = cov / var
+        return {'buckets': buckets, 'time_per_element': time_per_element,
+                'exponent': exponent}
+
+    def clear(self):
+        """Clear recorded calls."""
+        self.buckets = dict()
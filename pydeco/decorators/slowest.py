@@ -0,0 +1,122 @@
+"""Slowest calls decorator."""
+import heapq
+import threading
+from collections import namedtuple
+from time import perf_counter, time
+
+from ..decorator import Decorator
+
+SlowCall = namedtuple('SlowCall', ['duration', 'timestamp', 'args', 'kwargs'])
+SlowCall.__doc__ = """Call recorded by :class:`SlowestCalls`.
+
+Parameters
+----------
+duration : float
+    Duration of the call in seconds.
+timestamp : float
+    Time (from :func:`time.time`) at which the call started.
+args : tuple
+    Summaries of positional arguments (see :func:`summarize`).
+kwargs : dict
+    Summaries of keyword arguments (see :func:`summarize`).
+"""
+
+
+def summarize(obj):
+    """Return a cheap summary of `obj` that never includes its values.
+
+    Returns
+    -------
+    summary : tuple
+        ``(type name, shape)`` for objects with a ``shape`` attribute (ex:
+        NumPy arrays), ``(type name, length)`` for sized objects, and
+        ``(type name,)`` otherwise.
+    """
+    name = type(obj).__name__
+    shape = getattr(obj, 'shape', None)
+    if isinstance(shape, tuple):
+        return (name, shape)
+    try:
+        return (name, len(obj))
+    except Exception:
+        return (name,)
+
+
+class SlowestCalls(Decorator):
+    """Decorator keeping the `n` slowest calls of each decorated method.
+
+    Calls are kept in a bounded min-heap per method, so that recording a call
+    faster than the `n` slowest ones only costs a comparison. Arguments are
+    summarized with :func:`summarize` (types, lengths, shapes).
+
+    Parameters
+    ----------
+    n : int
+        Number of calls kept per method.
+
+    """
+
+    def __init__(self, *args, n=10, **kwargs):
+        if n < 1:
+            raise ValueError('`n` should be a positive integer.')
+        self.n = n
+        self.heaps = dict()
+        self._n_calls = 0
+        self._lock = threading.Lock()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (without lock)."""
+        state = Decorator.__getstate__(self)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        Decorator.__setstate__(self, state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'SlowestCalls(n={}, methods={})'.format(
+            self.n, sorted(self.heaps))
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with call duration measurement."""
+        timestamp = time()
+        ts = perf_counter()
+        outs = func(instance, *args, **kwargs)
+        duration = perf_counter() - ts
+
+        heap = self.heaps.get(func.__name__)
+        if heap is not None and len(heap) >= self.n and (
+                duration <= heap[0][0]):
+            # faster than the slowest calls: no lock needed
+            return outs
+        call = SlowCall(duration, timestamp,
+                        tuple(summarize(arg) for arg in args),
+                        {k: summarize(v) for k, v in kwargs.items()})
+        with self._lock:
+            heap = self.heaps.get(func.__name__)
+            if heap is None:
+                heap = self.heaps[func.__name__] = []
+            self._n_calls += 1
+            entry = (duration, self._n_calls, call)
+            if len(heap) < self.n:
+                heapq.heappush(heap, entry)
+            elif duration > heap[0][0]:
+                heapq.heappushpop(heap, entry)
+        return outs
+
+    def slowest(self, name):
+        """Return the slowest calls of method `name`, slowest first."""
+        if name not in self.heaps:
+            raise ValueError('No call recorded for "{}".'.format(name))
+        with self._lock:
+            entries = list(self.heaps[name])
+        return [entry[2] for entry in sorted(entries, reverse=True)]
+
+    def clear(self):
+        """Clear recorded calls."""
+        with self._lock:
+            self.heaps = dict()
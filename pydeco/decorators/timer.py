@@ -0,0 +1,250 @@
+"""Timer decorator."""
+import time
+
+from ..decorator import Decorator
+from ..utils.histogram import Histogram
+from ..utils.openmetrics import Metric
+
+# thread CPU time (Python >= 3.7)
+_thread_time_ns = getattr(time, 'thread_time_ns', None)
+
+
+def _add_to(counts, other_counts):
+    """Add values of `other_counts` to `counts` (dicts keyed by name)."""
+    for name, count in other_counts.items():
+        counts[name] = counts.get(name, 0) + count
+
+
+class Timer(Decorator):
+    """Decorator measuring running time of decorated methods.
+
+    When sampling is enabled (see :class:`pydeco.Decorator`), counts and
+    runtimes are estimates: each sampled call accounts for
+    :attr:`sample_weight` calls.
+
+    Parameters
+    ----------
+    verbose : bool
+        If True, print the runtime of each measured call.
+    histogram : bool
+        If True, record runtimes of each method in a :class:`Histogram` (with
+        a ns resolution) to query percentiles.
+    cpu_time : bool
+        If True, also measure CPU time of the calling thread during calls, to
+        separate waiting (I/O, locks, sleep) from compute.
+
+    Attributes
+    ----------
+    run : int | float
+        (Estimated) number of calls.
+    run_by_func : dict
+        (Estimated) number of calls by method name.
+    total_runtime : float
+        (Estimated) total runtime (in ms).
+    runtime_by_func : dict
+        (Estimated) total runtime (in ms) by method name.
+    sampled_run : int
+        Number of calls actually measured.
+    histogram_by_func : dict
+        Histogram of measured runtimes (in ms) by method name.
+    overhead_by_func : dict
+        Decorators overhead (in ms) included in each measured runtime, by
+        method name (see :func:`pydeco.utils.calibrate`).
+    corrected_total_runtime : float
+        (Estimated) total runtime (in ms) minus decorators overhead.
+    corrected_runtime_by_func : dict
+        (Estimated) total runtime (in ms) minus decorators overhead by method
+        name.
+    total_cpu_runtime : float
+        (Estimated) total thread CPU time (in ms), if `cpu_time` is True.
+    cpu_runtime_by_func : dict
+        (Estimated) total thread CPU time (in ms) by method name, if
+        `cpu_time` is True.
+
+    """
+
+    def __init__(self, *args, verbose=False, histogram=False, cpu_time=False,
+                 **kwargs):
+        if cpu_time and _thread_time_ns is None:
+            raise ValueError('Thread CPU time is not available on this '
+                             'platform.')
+        self.verbose = verbose
+        self.cpu_time = cpu_time
+        self.total_cpu_runtime = 0
+        self.cpu_runtime_by_func = dict()
+        self.histogram = histogram
+        self.histogram_by_func = dict()
+        self.run = 0
+        self.run_by_func = dict()
+        self.total_runtime = 0
+        self.runtime_by_func = dict()
+        self.sampled_run = 0
+        self.overhead_by_func = dict()
+        self.corrected_total_runtime = 0
+        self.corrected_runtime_by_func = dict()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __repr__(self):
+        """Return the string representation."""
+        return ('Timer(run={}, run_by_func={}, total_runtime={:2.2f} ms)'
+                .format(self.run, self.run_by_func, self.total_runtime))
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with runtime measurement."""
+        if self.cpu_time:
+            cpu_ts = _thread_time_ns()
+
+        # save current time
+        ts = time.perf_counter()
+
+        # call `func` on inputs
+        outs = func(instance, *args, **kwargs)
+
+        # compute elapsed time
+        runtime = (time.perf_counter() - ts) * 1000
+        if self.cpu_time:
+            cpu_runtime = (_thread_time_ns() - cpu_ts) / 1e6
+            self.record(func.__name__, runtime, cpu_runtime)
+        else:
+            self.record(func.__name__, runtime)
+
+        if self.verbose:
+            print('[Log] runtime {!r} : {:2.2f} ms'.format(
+                func.__name__, runtime))
+
+        # return outputs of `func`
+        return outs
+
+    def record(self, name, runtime, cpu_runtime=None):
+        """Record a measured call of method `name` lasting `runtime` ms.
+
+        Parameters
+        ----------
+        name : str
+            Method name.
+        runtime : float
+            Wall time of the call (in ms).
+        cpu_runtime : float | None
+            Thread CPU time of the call (in ms).
+
+        """
+        weight = self.sample_weight
+        self.sampled_run += 1
+        self.run += weight
+        self.run_by_func[name] = self.run_by_func.get(name, 0) + weight
+        self.total_runtime += runtime * weight
+        self.runtime_by_func[name] = (
+            self.runtime_by_func.get(name, 0) + runtime * weight)
+        corrected = max(runtime - self.overhead_by_func.get(name, 0), 0)
+        self.corrected_total_runtime += corrected * weight
+        self.corrected_runtime_by_func[name] = (
+            self.corrected_runtime_by_func.get(name, 0) + corrected * weight)
+        if cpu_runtime is not None:
+            self.total_cpu_runtime += cpu_runtime * weight
+            self.cpu_runtime_by_func[name] = (
+                self.cpu_runtime_by_func.get(name, 0) + cpu_runtime * weight)
+        if self.histogram:
+            histogram = self.histogram_by_func.get(name)
+            if histogram is None:
+                histogram = self.histogram_by_func[name] = Histogram(
+                    resolution=1e-6)
+            histogram.record(runtime)
+
+    def set_overhead(self, name, overhead):
+        """Set decorators overhead (in s) included in runtimes of `name`."""
+        self.overhead_by_func[name] = overhead * 1000
+
+    def split(self, name):
+        """Return wall, CPU and waiting total times (in ms) of `name`.
+
+        Waiting time is the part of wall time not spent computing on the
+        calling thread (I/O, locks, sleep, other threads holding the GIL).
+        """
+        if name not in self.cpu_runtime_by_func:
+            raise ValueError('No CPU time recorded for "{}".'.format(name))
+        wall = self.runtime_by_func[name]
+        cpu = self.cpu_runtime_by_func[name]
+        return wall, cpu, max(wall - cpu, 0)
+
+    def percentiles(self, name, qs=(50, 99, 99.9)):
+        """Return runtime quantiles (in ms) of method `name`."""
+        if name not in self.histogram_by_func:
+            raise ValueError('No histogram recorded for "{}".'.format(name))
+        return self.histogram_by_func[name].percentiles(qs)
+
+    def metrics(self):
+        """Return calls, runtimes and latency histograms by method."""
+        metrics = []
+        for name, run in list(self.run_by_func.items()):
+            metrics.append(Metric('calls', 'counter', 'Number of calls.',
+                                  name, run))
+        for name, runtime in list(self.runtime_by_func.items()):
+            metrics.append(Metric('runtime_seconds', 'counter',
+                                  'Total wall time of calls.', name,
+                                  runtime / 1000))
+        for name, runtime in list(self.cpu_runtime_by_func.items()):
+            metrics.append(Metric('cpu_seconds', 'counter',
+                                  'Total thread CPU time of calls.', name,
+                                  runtime / 1000))
+        for name, histogram in list(self.histogram_by_func.items()):
+            metrics.append(Metric('latency_seconds', 'histogram',
+                                  'Wall time of measured calls.', name,
+                                  histogram.copy(scale=1e-3)))
+        return metrics
+
+    def restore(self, snapshot, classname):
+        """Restore calls, runtimes and histograms from `snapshot`.
+
+        Snapshots only hold metrics: measured calls are restored as calls and
+        corrected runtimes as runtimes (see :meth:`pydeco.Decorator.restore`).
+        """
+        self.run_by_func = dict()
+        self.runtime_by_func = dict()
+        self.cpu_runtime_by_func = dict()
+        self.histogram_by_func = dict()
+        values = snapshot.select(classname, self.__class__.__name__)
+        for (metric, name), value in values.items():
+            if metric == 'calls':
+                self.run_by_func[name] = value
+            elif metric == 'runtime_seconds':
+                self.runtime_by_func[name] = value * 1000
+            elif metric == 'cpu_seconds':
+                self.cpu_runtime_by_func[name] = value * 1000
+            elif metric == 'latency_seconds':
+                self.histogram_by_func[name] = value.copy(scale=1e3,
+                                                          resolution=1e-6)
+        self.run = sum(self.run_by_func.values())
+        self.sampled_run = self.run
+        self.total_runtime = sum(self.runtime_by_func.values())
+        self.total_cpu_runtime = sum(self.cpu_runtime_by_func.values())
+        self.corrected_runtime_by_func = dict(self.runtime_by_func)
+        self.corrected_total_runtime = self.total_runtime
+
+    def merge(self, other):
+        """Add measurements of `other` timer (ex: a copy) to the current one.
+
+        Parameters
+        ----------
+        other : Timer
+            Timer to merge, such as the timer of a deep-copied instance or a
+            timer sent back from another thread or process.
+
+        """
+        self.run += other.run
+        self.sampled_run += other.sampled_run
+        self.total_runtime += other.total_runtime
+        self.corrected_total_runtime += other.corrected_total_runtime
+        self.total_cpu_runtime += other.total_cpu_runtime
+        _add_to(self.run_by_func, other.run_by_func)
+        _add_to(self.runtime_by_func, other.runtime_by_func)
+        _add_to(self.corrected_runtime_by_func,
+                other.corrected_runtime_by_func)
+        _add_to(self.cpu_runtime_by_func, other.cpu_runtime_by_func)
+        for name, histogram in other.histogram_by_func.items():
+            if name not in self.histogram_by_func:
+                self.histogram_by_func[name] = Histogram(
+                    resolution=histogram.resolution,
+                    sub_bucket_bits=histogram.sub_bucket_bits,
+                    max_bits=histogram.max_bits)
+            self.histogram_by_func[name].merge(histogram)
+        return self
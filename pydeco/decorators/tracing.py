@@ -0,0 +1,136 @@
+"""Tracing decorator exporting Chrome trace-event timelines."""
+import json
+import os
+from itertools import count
+from threading import get_ident
+from time import perf_counter
+
+from ..decorator import Decorator
+
+# process id cache, refreshed in forked children
+_PID = os.getpid()
+
+
+def _refresh_pid():
+    global _PID
+    _PID = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_refresh_pid)
+
+
+class Tracer(Decorator):
+    """Decorator recording a timeline of decorated method calls.
+
+    Each call is recorded (at its end) as a "complete" event into a
+    preallocated ring buffer of ``capacity`` slots: once full, the oldest
+    records are overwritten. Nested decorated calls are rendered as nested
+    slices by trace viewers (``chrome://tracing`` or
+    https://ui.perfetto.dev).
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of recorded calls.
+    sink : MmapTraceSink | None
+        If set, calls are recorded into this sink (ex: a memory-mapped file
+        readable after a crash) instead of the in-memory buffer.
+
+    Examples
+    --------
+    >>> tracer = Tracer(capacity=100000)
+    >>> @MethodsDecorator(mapping={tracer: ['fit', 'predict']})
+    >>> class MyClass():
+    >>>     ...
+    >>> tracer.flush('trace.json')
+
+    """
+
+    def __init__(self, *args, capacity=65536, sink=None, **kwargs):
+        if capacity < 1:
+            raise ValueError('`capacity` should be a positive integer.')
+        self.capacity = capacity
+        self.sink = sink
+        self.clear()
+        Decorator.__init__(self, *args, **kwargs)
+
+    def __getstate__(self):
+        """Return state (with the buffer cursor as an integer)."""
+        state = Decorator.__getstate__(self)
+        state['_cursor'] = self._n_records
+        return state
+
+    def __setstate__(self, state):
+        """Restore state."""
+        state['_n_records'] = state['_cursor']
+        state['_cursor'] = count(state['_cursor'])
+        Decorator.__setstate__(self, state)
+
+    def clear(self):
+        """Clear recorded calls."""
+        self._records = [None] * self.capacity
+        # slots are claimed with `next` (atomic), `_n_records` tracks the
+        # position without consuming it
+        self._cursor = count()
+        self._n_records = 0
+        if self.sink is not None:
+            self.sink.clear()
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Wrap input instance method with call recording."""
+        ts = perf_counter()
+        try:
+            return func(instance, *args, **kwargs)
+        finally:
+            te = perf_counter()
+            if self.sink is not None:
+                self.sink.write(func.__qualname__, _PID, get_ident(), ts,
+                                te - ts)
+            else:
+                index = next(self._cursor)
+                self._records[index % self.capacity] = (
+                    func.__qualname__, _PID, get_ident(), ts, te - ts)
+                self._n_records = max(self._n_records, index + 1)
+
+    @property
+    def records(self):
+        """Return recorded calls as (name, pid, tid, start, duration) tuples.
+
+        Records are sorted by start time, durations are in seconds.
+        """
+        if self.sink is not None:
+            records = self.sink.read()
+        else:
+            records = [record for record in list(self._records)
+                       if record is not None]
+        return sorted(records, key=lambda record: record[3])
+
+    def to_chrome_trace(self):
+        """Return recorded calls in the Chrome trace-event format."""
+        events = [
+            {'name': name, 'cat': 'pydeco', 'ph': 'X', 'pid': pid,
+             'tid': tid, 'ts': start * 1e6, 'dur': duration * 1e6}
+            for name, pid, tid, start, duration in self.records
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path, trace=None):
+        """Write recorded calls (or `trace`) to `path` as Chrome JSON."""
+        trace = self.to_chrome_trace() if trace is None else trace
+        with open(path, 'w') as file:
+            json.dump(trace, file)
+
+    def flush(self, path=None):
+        """Export recorded calls (if `path` is given) and clear them.
+
+        Returns
+        -------
+        trace : dict
+            Recorded calls in the Chrome trace-event format.
+        """
+        trace = self.to_chrome_trace()
+        self.clear()
+        if path is not None:
+            self.export(path, trace=trace)
+        return trace
@@ -1,3 +1,9 @@
 """Util functions."""
+from .calibration import calibrate
+from .histogram import Histogram
 from .misc import is_wrapped, wrapped_class, PYTHON_VERSION
+from .overhead import OverheadController
+from .parallel import SharedInstance, WorkerContext
 from .parser import CONFIG
+from .snapshot import Snapshot
+from .tracefile import MmapTraceSink, read_trace_file
@@ -0,0 +1,156 @@
+"""Calibration of decorators overhead."""
+import logging
+import pickle
+from copy import deepcopy
+from inspect import (isawaitable, isclass, iscoroutine, iscoroutinefunction,
+                     unwrap)
+from time import perf_counter
+
+from .misc import is_wrapped
+
+
+def _clean_copy(decorator):
+    """Return a copy of `decorator` that is not linked to any instance."""
+    # copied through the decorator state (without locks, instances, etc.),
+    # or deep copied if the state holds objects that cannot be pickled (ex:
+    # lambdas)
+    try:
+        c_decorator = pickle.loads(pickle.dumps(decorator))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        c_decorator = deepcopy(decorator)
+    c_decorator._register()
+    c_decorator.flush_instances()
+    # probe calls must not reach sinks or pools of the decorator
+    if getattr(c_decorator, 'sink', None) is not None:
+        c_decorator.sink = None
+    if getattr(c_decorator, 'executor', None) is not None:
+        c_decorator.executor = 'thread'
+    return c_decorator
+
+
+def _probe_call(func):
+    """Return True if `func` can be called synchronously without arguments."""
+    try:
+        outs = func()
+    except Exception:
+        return False
+    if isawaitable(outs):
+        if iscoroutine(outs):
+            outs.close()
+        return False
+    return True
+
+
+def _time_calls(func, n_calls, repeat):
+    """Return the minimum time per call of `func` over `repeat` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        ts = perf_counter()
+        for _ in range(n_calls):
+            func()
+        best = min(best, perf_counter() - ts)
+    return best / n_calls
+
+
+def _clock_overhead(n_calls, repeat):
+    """Return the time between two consecutive clock reads."""
+    best = float('inf')
+    for _ in range(repeat):
+        for _ in range(n_calls):
+            ts = perf_counter()
+            best = min(best, perf_counter() - ts)
+    return best
+
+
+def calibrate(obj, methods=None, n_calls=10000, repeat=5, apply=True):
+    """Measure the overhead of the decorators stack of a wrapped class.
+
+    For each decorated method, copies of its decorators (not linked to any
+    instance) are stacked one layer at a time on a no-op method and the cost
+    of each partial stack is measured. The overhead included in the
+    measurements of a decorator is the cost of the layers applied below it
+    (plus a clock read): if ``apply`` is True, it is passed to the
+    ``set_overhead`` method of decorators defining one (ex:
+    :class:`pydeco.decorators.Timer`) so that they report corrected figures.
+
+    Only synchronous calls without arguments can be probed: coroutine methods
+    and decorators that do not support such calls (ex: async decorators,
+    batchers or size functions requiring arguments) are left out with a
+    warning, as well as decorators probed after them on the same method.
+
+    Parameters
+    ----------
+    obj : type | object
+        Class returned by :class:`pydeco.MethodsDecorator` or an instance of
+        it.
+    methods : list of str | None
+        Methods to calibrate (all decorated methods if None).
+    n_calls : int
+        Number of calls per measurement.
+    repeat : int
+        Number of measurements (the fastest one is kept).
+    apply : bool
+        If True, pass measured overheads to decorators.
+
+    Returns
+    -------
+    overheads : dict
+        Mapping from method name to the overhead (in seconds) of a call
+        through the full decorators stack.
+
+    """
+    if not is_wrapped(obj):
+        raise ValueError('Input object is not wrapped.')
+    if isclass(obj):
+        mapping = obj._Wrapper__decorator_mapping
+    else:
+        mapping = obj._decorator_mapping
+
+    # decorators of each method, from the innermost to the outermost one
+    stacks = dict()
+    for decorator, decorated_methods in mapping.items():
+        for method in decorated_methods:
+            stacks.setdefault(method, []).append(decorator)
+    if methods is not None:
+        stacks = {method: stacks[method] for method in methods}
+
+    clock = _clock_overhead(n_calls, repeat)
+
+    overheads = dict()
+    for method, decorators in stacks.items():
+        if iscoroutinefunction(unwrap(getattr(obj, method))):
+            logging.warning('{} is a coroutine method and cannot be '
+                            'calibrated'.format(method))
+            continue
+
+        class Probe(object):
+            pass
+
+        def noop(self, *args, **kwargs):
+            pass
+        noop.__name__ = method
+        noop.__qualname__ = getattr(
+            getattr(obj, method), '__qualname__', method)
+        Probe.noop = noop
+
+        probe = Probe()
+        baseline = _time_calls(probe.noop, n_calls, repeat)
+        inner = 0.
+        for decorator in decorators:
+            probe_func = Probe.noop
+            if decorator.probeable:
+                Probe.noop = _clean_copy(decorator)(probe_func)
+            if not (decorator.probeable and _probe_call(probe.noop)):
+                Probe.noop = probe_func
+                logging.warning(
+                    '{} of method {} cannot be probed synchronously without '
+                    'arguments: outer decorators are not calibrated'.format(
+                        type(decorator).__name__, method))
+                break
+            if apply and hasattr(decorator, 'set_overhead'):
+                decorator.set_overhead(method, inner + clock)
+            inner = max(_time_calls(probe.noop, n_calls, repeat) - baseline,
+                        0.)
+        overheads[method] = inner
+
+    return overheads
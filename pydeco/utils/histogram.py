@@ -0,0 +1,169 @@
+"""Log-bucketed latency histogram."""
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+
+class Histogram(object):
+    """Fixed-memory log-linear histogram (HDR-style).
+
+    Values are converted to integers in units of ``resolution``. Integers
+    lower than ``2 ** sub_bucket_bits`` get their own bucket; larger ones are
+    grouped in buckets whose width grows with their magnitude, so that the
+    relative error stays below ``2 ** (1 - sub_bucket_bits)``. Bucket
+    counters are stored in a single array: recording a value is O(1) and two
+    histograms with the same parameters can be merged by adding counters.
+
+    Parameters
+    ----------
+    resolution : float
+        Smallest distinguishable value (ex: ``1e-6`` to record durations in ms
+        with a ns resolution).
+    sub_bucket_bits : int
+        Number of bits of precision of bucketed values.
+    max_bits : int
+        Number of bits of the largest trackable value (in units of
+        ``resolution``). Larger values are counted in the last bucket.
+
+    Attributes
+    ----------
+    count : int
+        Number of recorded values.
+    total : float
+        Sum of recorded values.
+    min : float | None
+        Smallest recorded value.
+    max : float | None
+        Largest recorded value.
+
+    """
+
+    def __init__(self, resolution=1., sub_bucket_bits=7, max_bits=40):
+        if sub_bucket_bits < 2 or max_bits < sub_bucket_bits:
+            raise ValueError('`sub_bucket_bits` should be in [2, max_bits].')
+        self.resolution = resolution
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_bits = max_bits
+        self._n_linear = 2 ** sub_bucket_bits
+        self._half = self._n_linear // 2
+        n_buckets = self._n_linear + (max_bits - sub_bucket_bits) * self._half
+        self.counts = array('Q', bytes(8 * n_buckets))
+        self.count = 0
+        self.total = 0.
+        self.min = None
+        self.max = None
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'Histogram(count={}, min={}, max={})'.format(
+            self.count, self.min, self.max)
+
+    def _index(self, value):
+        """Return bucket index of input value."""
+        v = int(value / self.resolution)
+        if v < self._n_linear:
+            return max(v, 0)
+        shift = v.bit_length() - self.sub_bucket_bits
+        index = self._n_linear + (shift - 1) * self._half + (v >> shift)
+        return min(index - self._half, len(self.counts) - 1)
+
+    def _value(self, index):
+        """Return value at the middle of input bucket."""
+        if index < self._n_linear:
+            return index * self.resolution
+        shift, sub = divmod(index - self._n_linear, self._half)
+        shift += 1
+        low = (sub + self._half) << shift
+        return (low + (2 ** shift - 1) / 2) * self.resolution
+
+    def record(self, value, count=1):
+        """Record `value` (`count` times)."""
+        self.counts[self._index(value)] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add counts of `other` histogram to the current one."""
+        if (other.resolution, other.sub_bucket_bits, other.max_bits) != (
+                self.resolution, self.sub_bucket_bits, self.max_bits):
+            raise ValueError('Cannot merge histograms with different '
+                             'parameters.')
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                if self.min is None or value < self.min:
+                    self.min = value
+                if self.max is None or value > self.max:
+                    self.max = value
+        return self
+
+    @property
+    def mean(self):
+        """Return mean of recorded values."""
+        return self.total / self.count if self.count else None
+
+    def percentiles(self, qs):
+        """Return percentiles `qs` (in [0, 100]) of recorded values."""
+        if not self.count:
+            return [None for _ in qs]
+        cumulated = list(accumulate(self.counts))
+        values = []
+        for q in qs:
+            rank = max(1, int(round(q / 100 * self.count)))
+            value = self._value(bisect_left(cumulated, rank))
+            # bucket values are approximate: clip to observed range
+            values.append(min(max(value, self.min), self.max))
+        return values
+
+    def percentile(self, q):
+        """Return percentile `q` (in [0, 100]) of recorded values."""
+        return self.percentiles([q])[0]
+
+    def cumulative_counts(self, bounds):
+        """Return numbers of recorded values lower than or equal to `bounds`.
+
+        Counts are approximate: the bucket containing a bound is counted
+        entirely.
+        """
+        cumulated = list(accumulate(self.counts))
+        counts = []
+        for bound in bounds:
+            if self.max is not None and bound >= self.max:
+                counts.append(self.count)
+            elif self.min is None or bound < self.min:
+                counts.append(0)
+            else:
+                counts.append(cumulated[self._index(bound)])
+        return counts
+
+    def copy(self, scale=1., resolution=None):
+        """Return a copy of the histogram with values multiplied by `scale`.
+
+        Scaling is exact (ex: ``scale=1e-3`` converts ms into s) as bucket
+        counters only depend on values in units of ``resolution``. The
+        resolution of the copy (``resolution * scale`` by default) can be set
+        to avoid rounding errors (ex: to merge it with other histograms).
+        """
+        histogram = Histogram.__new__(Histogram)
+        histogram.__dict__.update(self.__dict__)
+        histogram.counts = array('Q', self.counts)
+        histogram.resolution = (self.resolution * scale if resolution is None
+                                else resolution)
+        histogram.total = self.total * scale
+        if self.min is not None:
+            histogram.min = self.min * scale
+            histogram.max = self.max * scale
+        return histogram
+
+    def clear(self):
+        """Clear recorded values."""
+        self.__init__(self.resolution, self.sub_bucket_bits, self.max_bits)
@@ -0,0 +1,205 @@
+"""OpenMetrics (Prometheus) exposition of decorators statistics."""
+import os
+import threading
+from collections import namedtuple
+
+from .histogram import Histogram
+from .misc import is_wrapped
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+# default histogram buckets (in s)
+BUCKETS = (1e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, .1, .5, 1., 5., 10.)
+
+Metric = namedtuple('Metric', ['name', 'type', 'help', 'method', 'value'])
+Metric.__doc__ = """Metric sample returned by :meth:`pydeco.Decorator.metrics`.
+
+Parameters
+----------
+name : str
+    Metric name, without the ``pydeco_`` prefix and ``_total`` suffix (ex:
+    ``'runtime_seconds'``).
+type : str
+    Metric type: ``'counter'``, ``'gauge'`` or ``'histogram'``.
+help : str
+    Metric description.
+method : str
+    Name of the decorated method.
+value : float | Histogram
+    Sample value (a :class:`Histogram` for histograms).
+"""
+
+
+def live_decorators():
+    """Return decorators of registered wrappers and of their instances.
+
+    Returns
+    -------
+    decorators : list of tuple
+        List of (wrapped class name, decorator) tuples.
+    """
+    from ..decorator import shared_wrappers
+    from .register import get_registered_wrappers_classnames
+
+    decorators = dict()
+
+    def add(decorator, classname):
+        if id(decorator) not in decorators:
+            decorators[id(decorator)] = (classname, decorator)
+
+    for wrapper_name in sorted(get_registered_wrappers_classnames()):
+        wrapper = shared_wrappers.get(wrapper_name)
+        if wrapper is None or not is_wrapped(wrapper):
+            continue
+        classname = wrapper._Wrapper__wrapped_class.__name__
+        for decorator in list(wrapper._Wrapper__decorator_mapping):
+            add(decorator, classname)
+            for instance in list(getattr(decorator, 'instances', [])):
+                if is_wrapped(instance):
+                    for c_decorator in list(instance._decorator_mapping):
+                        add(c_decorator, classname)
+    return list(decorators.values())
+
+
+def _format_labels(labels):
+    escaped = [
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def render(decorators=None, buckets=BUCKETS):
+    """Render decorators statistics in the OpenMetrics text format.
+
+    Statistics are read from :meth:`pydeco.Decorator.metrics` without taking
+    any lock: decorated calls are never blocked while rendering. Samples of
+    decorators of the same type decorating the same class (ex: decorators of
+    deep-copied instances) are aggregated: counters and histograms are
+    summed, gauges keep their maximum.
+
+    Parameters
+    ----------
+    decorators : list of tuple | None
+        List of (class name, decorator) tuples. Defaults to
+        :func:`live_decorators`.
+    buckets : tuple of float
+        Upper bounds of histogram buckets.
+
+    Returns
+    -------
+    text : str
+        OpenMetrics exposition.
+
+    """
+    if decorators is None:
+        decorators = live_decorators()
+
+    families = dict()  # name -> (type, help, {labels: value})
+    for classname, decorator in decorators:
+        for metric in decorator.metrics():
+            family = families.setdefault(
+                metric.name, (metric.type, metric.help, dict()))
+            labels = (('class', classname),
+                      ('decorator', decorator.__class__.__name__),
+                      ('method', metric.method))
+            samples = family[2]
+            if isinstance(metric.value, Histogram):
+                if labels in samples:
+                    samples[labels].merge(metric.value)
+                else:
+                    samples[labels] = metric.value.copy()
+            elif labels not in samples:
+                samples[labels] = metric.value
+            elif metric.type == 'gauge':
+                samples[labels] = max(samples[labels], metric.value)
+            else:
+                samples[labels] += metric.value
+
+    lines = []
+    for name in sorted(families):
+        type_, help_, samples = families[name]
+        name = 'pydeco_' + name
+        lines.append('# TYPE {} {}'.format(name, type_))
+        lines.append('# HELP {} {}'.format(name, help_))
+        for labels, value in sorted(samples.items()):
+            if type_ == 'histogram':
+                counts = value.cumulative_counts(buckets)
+                for bound, count in zip(buckets + (float('inf'), ),
+                                        counts + [value.count]):
+                    lines.append('{}_bucket{} {}'.format(
+                        name, _format_labels(
+                            labels + (('le', _format_value(bound)), )),
+                        count))
+                lines.append('{}_count{} {}'.format(
+                    name, _format_labels(labels), value.count))
+                lines.append('{}_sum{} {}'.format(
+                    name, _format_labels(labels), _format_value(value.total)))
+            else:
+                suffix = '_total' if type_ == 'counter' else ''
+                lines.append('{}{}{} {}'.format(
+                    name, suffix, _format_labels(labels),
+                    _format_value(value)))
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write(path, decorators=None, buckets=BUCKETS):
+    """Write decorators statistics to `path` atomically (see `render`)."""
+    text = render(decorators, buckets=buckets)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def serve(port=8000, addr='127.0.0.1', decorators=None, buckets=BUCKETS):
+    """Serve decorators statistics over HTTP from a background thread.
+
+    Parameters
+    ----------
+    port : int
+        Port to listen on (``0`` to pick a free port).
+    addr : str
+        Address to bind to (``''`` to listen on all interfaces).
+    decorators : list of tuple | None
+        List of (class name, decorator) tuples. Defaults to decorators
+        returned by :func:`live_decorators` at each request.
+    buckets : tuple of float
+        Upper bounds of histogram buckets.
+
+    Returns
+    -------
+    server : HTTPServer
+        Running server (stop it with ``server.shutdown()``).
+
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+    class Server(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            body = render(decorators, buckets=buckets).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = Server((addr, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
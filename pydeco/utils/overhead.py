@@ -0,0 +1,135 @@
+"""Overhead budget controller for decorators."""
+from time import perf_counter
+
+
+class OverheadController(object):
+    """Throttle a decorator so that its overhead stays within a budget.
+
+    The overhead of a call is measured as the time spent in
+    :meth:`Decorator.wrapper` minus the time spent in the decorated method.
+    Every ``window`` measured calls, the sampling rate of the decorator is
+    adjusted so that the estimated overhead ratio stays around half of the
+    budget. If the required rate falls below ``min_rate``, the decorator is
+    bypassed and used again later on to probe whether headroom returned
+    (activation states of the decorator are left untouched).
+
+    Parameters
+    ----------
+    budget : float
+        Maximum ratio between decorator overhead and decorated method time
+        (ex: ``.01`` for 1%).
+    window : int
+        Number of measured calls between two adjustments.
+    min_rate : float
+        Sampling rate below which the decorator is deactivated.
+    probe_after : int
+        Number of sampled calls to skip while throttled before probing the
+        decorator again. It doubles after each failed probe.
+
+    Attributes
+    ----------
+    rate : float
+        Current sampling rate.
+    throttled : bool
+        True if the decorator is bypassed by the controller.
+
+    """
+
+    def __init__(self, budget=.01, window=100, min_rate=1e-3, probe_after=100):
+        if budget <= 0:
+            raise ValueError('`budget` should be positive.')
+        if not 0 < min_rate <= 1:
+            raise ValueError('`min_rate` should be in ]0, 1].')
+        self.budget = budget
+        self.window = window
+        self.min_rate = min_rate
+        self.probe_after = probe_after
+        self.rate = 1.
+        self.throttled = False
+        self._probe_after = probe_after
+        self._probe_countdown = probe_after
+        self._reset()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return ('OverheadController(budget={}, rate={:.4f}, throttled={})'
+                .format(self.budget, self.rate, self.throttled))
+
+    def _reset(self):
+        self._n_calls = 0
+        self._overhead = 0.
+        self._method_time = 0.
+
+    def call(self, decorator, instance, func, *args, **kwargs):
+        """Call `decorator.wrapper` while measuring its overhead."""
+        elapsed = []
+
+        def timed_func(instance, *args, **kwargs):
+            ts = perf_counter()
+            outs = func(instance, *args, **kwargs)
+            elapsed.append(perf_counter() - ts)
+            return outs
+        timed_func.__name__ = func.__name__
+        timed_func.__qualname__ = getattr(func, '__qualname__', func.__name__)
+        timed_func.__wrapped__ = func
+
+        ts = perf_counter()
+        outs = decorator.wrapper(instance, timed_func, *args, **kwargs)
+        total = perf_counter() - ts
+
+        method_time = sum(elapsed)
+        self.record(decorator, total - method_time, method_time)
+        return outs
+
+    def record(self, decorator, overhead, method_time):
+        """Record a measured call and adjust `decorator` if needed."""
+        self._n_calls += 1
+        self._overhead += overhead
+        self._method_time += method_time
+        if self._n_calls >= self.window:
+            self.adjust(decorator)
+
+    def adjust(self, decorator):
+        """Adjust sampling rate of `decorator` based on the current window."""
+        if self._method_time > 0:
+            ratio = self._overhead / self._method_time
+        else:
+            ratio = float('inf')
+        self._reset()
+
+        if ratio * self.rate > self.budget:
+            rate = self.budget / (2 * ratio)
+            if rate < self.min_rate:
+                self.throttle(decorator)
+                return
+        elif ratio * self.rate < self.budget / 4 and self.rate < 1:
+            rate = min(1., self.budget / (2 * ratio)) if ratio > 0 else 1.
+        else:
+            rate = self.rate
+        # successful window: reset probing backoff
+        self._probe_after = self.probe_after
+        self._set_rate(decorator, rate)
+
+    def throttle(self, decorator):
+        """Bypass `decorator` until the next probe."""
+        if self.throttled:
+            return
+        # back off exponentially on failed probes
+        if self.rate == self.min_rate:
+            self._probe_after *= 2
+        self.throttled = True
+        self._probe_countdown = self._probe_after
+        self._set_rate(decorator, self.min_rate)
+
+    def tick(self, decorator):
+        """Count a sampled call of a throttled decorator and probe if due."""
+        if not self.throttled:
+            return
+        self._probe_countdown -= 1
+        if self._probe_countdown <= 0:
+            self.throttled = False
+            self._reset()
+
+    def _set_rate(self, decorator, rate):
+        self.rate = rate
+        decorator.set_sampling(rate=rate)
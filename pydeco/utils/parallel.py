@@ -0,0 +1,181 @@
+"""Parallel execution of methods of decorated instances."""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from inspect import isclass
+
+from .misc import is_wrapped
+
+# state of the current worker (see `WorkerContext`)
+_shared_instances = dict()
+_shipped_decorators = []
+
+
+def _init_worker(modules, data, instances_data):
+    """Initialize a worker with decorators and shared instances."""
+    from ..decorator import MethodsDecorator, shared_wrappers
+
+    # wrapper classes (and their decorators) created at import time
+    for module in modules:
+        import_module(module)
+    # decorators are loaded first so that instances resolve them by id
+    decorators, wrappers = pickle.loads(data)
+    _shipped_decorators.extend(decorators)
+    # re-create missing wrapper classes (ex: in "spawn" workers)
+    for classname, cls, mapping in wrappers:
+        if classname not in shared_wrappers:
+            shared_wrappers[classname] = MethodsDecorator(mapping)(cls)
+    _shared_instances.update(pickle.loads(instances_data))
+
+
+def _get_shared_instance(key):
+    """Return the shared instance `key` of the current worker."""
+    if key not in _shared_instances:
+        raise ValueError('Shared instance "{}" not found: the worker was not '
+                         'initialized by a `WorkerContext`.'.format(key))
+    return _shared_instances[key]
+
+
+class SharedInstance(object):
+    """Reference to an instance shipped once to each worker.
+
+    Pickling the reference only pickles its key: it is unpickled as the
+    worker copy of the instance. In the current process, attributes are
+    looked up on the instance itself (ex: with sequential backends).
+
+    Parameters
+    ----------
+    key : str
+        Key of the instance in workers.
+    instance : object
+        Referenced instance.
+
+    """
+
+    def __init__(self, key, instance):
+        self._key = key
+        self._instance = instance
+
+    def __getattr__(self, name):
+        """Return attribute `name` of the referenced instance."""
+        return getattr(self._instance, name)
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'SharedInstance({!r})'.format(self._instance)
+
+    def __reduce__(self):
+        """Pickle the reference as the key of the shared instance."""
+        return _get_shared_instance, (self._key, )
+
+
+class WorkerContext(object):
+    """Decorated objects shipped once to each worker of a process pool.
+
+    Decorators (with their configuration and statistics), definitions of
+    wrapper classes and shared instances are pickled once, when the pool is
+    created, and loaded by each worker before running tasks (wrapper classes
+    missing from a worker, such as classes decorated under
+    ``if __name__ == '__main__'`` in "spawn" workers, are re-created).
+
+    Tasks then only ship instance state: decorators of decorated instances
+    are pickled by id and resolved to the worker copies, and a
+    :class:`SharedInstance` reference is pickled by key.
+
+    Parameters
+    ----------
+    *objs : object
+        Decorated classes or instances. Instances are shared: each worker
+        holds a read-only copy of them, referenced by :meth:`ref`.
+
+    Examples
+    --------
+    >>> context = WorkerContext(instance)
+    >>> shared = context.ref(instance)
+    >>> with context.executor(max_workers=4) as executor:
+    >>>     results = list(executor.map(func, [shared] * 100))
+    >>> Parallel(n_jobs=4, backend=context.joblib_backend())(
+    >>>     delayed(func)(shared) for _ in range(100))
+
+    """
+
+    def __init__(self, *objs):
+        self.modules = []
+        self.decorators = []
+        self.wrappers = []
+        self.instances = dict()
+        for obj in objs:
+            if not is_wrapped(obj):
+                raise ValueError('{!r} is not decorated.'.format(obj))
+            cls = obj if isclass(obj) else obj.__class__
+            module = cls._Wrapper__wrapped_class.__module__
+            if module not in self.modules:
+                self.modules.append(module)
+            if all(cls.__name__ != name for name, _, _ in self.wrappers):
+                self.wrappers.append((
+                    cls.__name__, cls._Wrapper__wrapped_class,
+                    dict(cls._Wrapper__decorator_mapping)))
+            if isclass(obj):
+                mapping = cls._Wrapper__decorator_mapping
+            else:
+                mapping = obj._decorator_mapping
+                self.instances['{}-{}'.format(cls.__name__, id(obj))] = obj
+            for decorator in list(mapping) + list(
+                    cls._Wrapper__decorator_mapping):
+                if all(decorator is not d for d in self.decorators):
+                    self.decorators.append(decorator)
+
+    def ref(self, instance):
+        """Return a :class:`SharedInstance` referencing `instance`."""
+        for key, obj in self.instances.items():
+            if obj is instance:
+                return SharedInstance(key, instance)
+        raise ValueError('{!r} is not shared by the context.'.format(instance))
+
+    @property
+    def initializer(self):
+        """Worker initializer (to be called with :attr:`initargs`)."""
+        return _init_worker
+
+    @property
+    def initargs(self):
+        """Arguments of :attr:`initializer`, pickled once per pool."""
+        data = pickle.dumps((self.decorators, self.wrappers))
+        return self.modules, data, pickle.dumps(self.instances)
+
+    def executor(self, max_workers=None, **kwargs):
+        """Return a process pool executor with initialized workers.
+
+        Parameters
+        ----------
+        max_workers : int | None
+            Maximum number of workers.
+        **kwargs
+            Keyword arguments passed to
+            :class:`concurrent.futures.ProcessPoolExecutor`.
+
+        Returns
+        -------
+        executor : ProcessPoolExecutor
+            Executor.
+        """
+        return ProcessPoolExecutor(max_workers, initializer=self.initializer,
+                                   initargs=self.initargs, **kwargs)
+
+    def joblib_backend(self, **kwargs):
+        """Return a joblib multiprocessing backend with initialized workers.
+
+        Parameters
+        ----------
+        **kwargs
+            Keyword arguments passed to the backend (and to its pool).
+
+        Returns
+        -------
+        backend : joblib.parallel.MultiprocessingBackend
+            Backend to pass to :class:`joblib.Parallel`.
+        """
+        from joblib.parallel import MultiprocessingBackend
+
+        return MultiprocessingBackend(initializer=self.initializer,
+                                      initargs=self.initargs, **kwargs)
@@ -13,7 +13,12 @@ def parse_config():
     with open(abspath(join(PROJECT_DIR, 'config.yml')), 'r') as file:
         config = yaml.safe_load(file)
     for k, v in config.items():
-        config[k] = literal_eval(v)
+        if isinstance(v, str):
+            config[k] = literal_eval(v)
+    # environment variable overriding the configuration file
+    if 'PYDECO_DISABLE' in os.environ:
+        config['DISABLE'] = os.environ['PYDECO_DISABLE'].lower() not in (
+            '', '0', 'false', 'no')
     return config
 
 CONFIG = parse_config()
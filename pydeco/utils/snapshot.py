@@ -0,0 +1,247 @@
+"""Compact binary snapshots of decorators statistics."""
+import math
+import struct
+import time
+
+from .histogram import Histogram
+
+MAGIC = b'PYDECOSN'
+VERSION = 1
+# magic, version, timestamp, number of strings, number of entries
+HEADER = struct.Struct('<8sHdII')
+STRING = struct.Struct('<H')
+# class, decorator, metric and method string indices, metric type
+ENTRY = struct.Struct('<IIIIB')
+SCALAR = struct.Struct('<d')
+# resolution, sub-bucket bits, max bits, count, total, min, max, non-zero
+# buckets
+HISTOGRAM = struct.Struct('<dBBQdddI')
+BUCKET = struct.Struct('<IQ')
+TYPES = ('counter', 'gauge', 'histogram')
+
+
+class Snapshot(object):
+    """Snapshot of decorators statistics.
+
+    Snapshots hold the metrics returned by :meth:`pydeco.Decorator.metrics`
+    (counters, gauges and histograms by method) and not the decorators
+    themselves: they are small, fast to write and load, and two snapshots can
+    be diffed to compute rates. Statistics of decorators defining a
+    :meth:`pydeco.Decorator.restore` method (ex:
+    :class:`pydeco.decorators.Timer`) can be restored from a snapshot.
+
+    Parameters
+    ----------
+    values : dict
+        Mapping from ``(class name, decorator name, metric name, method)``
+        keys to ``(metric type, value)`` tuples.
+    timestamp : float | None
+        Time (from :func:`time.time`) of the snapshot (defaults to now).
+
+    """
+
+    def __init__(self, values, timestamp=None):
+        self.values = values
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'Snapshot(timestamp={}, n_values={})'.format(
+            self.timestamp, len(self.values))
+
+    @classmethod
+    def capture(cls, decorators=None):
+        """Capture statistics of `decorators`.
+
+        Parameters
+        ----------
+        decorators : list of tuple | None
+            List of (class name, decorator) tuples. Defaults to
+            :func:`pydeco.utils.openmetrics.live_decorators`.
+
+        """
+        if decorators is None:
+            from .openmetrics import live_decorators
+            decorators = live_decorators()
+        values = dict()
+        for classname, decorator in decorators:
+            for metric in decorator.metrics():
+                key = (classname, decorator.__class__.__name__, metric.name,
+                       metric.method)
+                if key in values:
+                    # aggregate decorators of the same class (ex: copies):
+                    # gauges keep their maximum
+                    value = values[key][1]
+                    if isinstance(value, Histogram):
+                        value.merge(metric.value)
+                    elif metric.type == 'gauge':
+                        values[key] = (metric.type, max(value, metric.value))
+                    else:
+                        values[key] = (metric.type, value + metric.value)
+                else:
+                    value = metric.value
+                    if isinstance(value, Histogram):
+                        value = value.copy()
+                    values[key] = (metric.type, value)
+        return cls(values)
+
+    def select(self, classname, decorator_name):
+        """Return values of decorators `decorator_name` of class `classname`.
+
+        Returns
+        -------
+        values : dict
+            Mapping from ``(metric name, method)`` to values (histograms are
+            copied).
+
+        """
+        values = dict()
+        for key, (type_, value) in self.values.items():
+            if key[:2] == (classname, decorator_name):
+                if isinstance(value, Histogram):
+                    value = value.copy()
+                values[key[2:]] = value
+        return values
+
+    def dumps(self):
+        """Return snapshot encoded in the binary format."""
+        strings = dict()
+        for key in self.values:
+            for string in key:
+                strings.setdefault(string, len(strings))
+
+        chunks = [HEADER.pack(MAGIC, VERSION, self.timestamp, len(strings),
+                              len(self.values))]
+        for string in strings:
+            encoded = string.encode('utf-8')
+            chunks.append(STRING.pack(len(encoded)))
+            chunks.append(encoded)
+        for key, (type_, value) in self.values.items():
+            chunks.append(ENTRY.pack(*[strings[string] for string in key],
+                                     TYPES.index(type_)))
+            if type_ == 'histogram':
+                buckets = [(index, count)
+                           for index, count in enumerate(value.counts)
+                           if count]
+                chunks.append(HISTOGRAM.pack(
+                    value.resolution, value.sub_bucket_bits, value.max_bits,
+                    value.count, value.total,
+                    math.nan if value.min is None else value.min,
+                    math.nan if value.max is None else value.max,
+                    len(buckets)))
+                chunks.extend(BUCKET.pack(*bucket) for bucket in buckets)
+            else:
+                chunks.append(SCALAR.pack(value))
+        return b''.join(chunks)
+
+    @classmethod
+    def loads(cls, buffer):
+        """Return snapshot decoded from `buffer`."""
+        magic, version, timestamp, n_strings, n_values = HEADER.unpack_from(
+            buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a pydeco snapshot.')
+        if version != VERSION:
+            raise ValueError('Unsupported snapshot version {}.'.format(
+                version))
+        offset = HEADER.size
+
+        strings = []
+        for _ in range(n_strings):
+            length, = STRING.unpack_from(buffer, offset)
+            offset += STRING.size
+            strings.append(
+                bytes(buffer[offset:offset + length]).decode('utf-8'))
+            offset += length
+
+        values = dict()
+        for _ in range(n_values):
+            entry = ENTRY.unpack_from(buffer, offset)
+            offset += ENTRY.size
+            key = tuple(strings[index] for index in entry[:4])
+            type_ = TYPES[entry[4]]
+            if type_ == 'histogram':
+                (resolution, sub_bucket_bits, max_bits, count, total, min_,
+                 max_, n_buckets) = HISTOGRAM.unpack_from(buffer, offset)
+                offset += HISTOGRAM.size
+                value = Histogram(resolution, sub_bucket_bits, max_bits)
+                for _ in range(n_buckets):
+                    index, bucket_count = BUCKET.unpack_from(buffer, offset)
+                    offset += BUCKET.size
+                    value.counts[index] = bucket_count
+                value.count, value.total = count, total
+                value.min = None if math.isnan(min_) else min_
+                value.max = None if math.isnan(max_) else max_
+            else:
+                value, = SCALAR.unpack_from(buffer, offset)
+                offset += SCALAR.size
+            values[key] = (type_, value)
+        return cls(values, timestamp=timestamp)
+
+    def save(self, path):
+        """Write snapshot to `path`."""
+        with open(path, 'wb') as file:
+            file.write(self.dumps())
+
+    @classmethod
+    def load(cls, path):
+        """Load snapshot from `path`."""
+        with open(path, 'rb') as file:
+            return cls.loads(file.read())
+
+    def diff(self, previous):
+        """Return the difference between the snapshot and a `previous` one.
+
+        Counters and histograms are subtracted (missing values in `previous`
+        count as zero, decreasing values or histogram buckets are considered
+        reset), gauges keep their current value.
+
+        Returns
+        -------
+        snapshot : Snapshot
+            Snapshot of differences, whose timestamp is the elapsed time (in
+            s) between both snapshots.
+
+        """
+        if previous.timestamp > self.timestamp:
+            raise ValueError('`previous` snapshot is not older.')
+        values = dict()
+        for key, (type_, value) in self.values.items():
+            old = previous.values.get(key, (type_, None))[1]
+            if type_ == 'gauge' or old is None:
+                values[key] = (type_, value)
+            elif type_ == 'counter' and value < old:
+                values[key] = (type_, value)
+            elif type_ == 'histogram' and (value.count < old.count or any(
+                    new < count for new, count in zip(value.counts,
+                                                      old.counts))):
+                # reset histogram (even if it got more values since)
+                values[key] = (type_, value.copy())
+            elif type_ == 'histogram':
+                delta = value.copy()
+                for index, count in enumerate(old.counts):
+                    if count:
+                        delta.counts[index] -= count
+                delta.count -= old.count
+                delta.total -= old.total
+                values[key] = (type_, delta)
+            else:
+                values[key] = (type_, value - old)
+        return Snapshot(values, timestamp=self.timestamp - previous.timestamp)
+
+    def rates(self, previous):
+        """Return per-second rates of counters since a `previous` snapshot.
+
+        Returns
+        -------
+        rates : dict
+            Mapping from ``(class name, decorator name, metric name,
+            method)`` to the counter increase per second.
+
+        """
+        delta = self.diff(previous)
+        if delta.timestamp == 0:
+            raise ValueError('Snapshots have the same timestamp.')
+        return {key: value / delta.timestamp
+                for key, (type_, value) in delta.values.items()
+                if type_ == 'counter'}
@@ -0,0 +1,187 @@
+"""Memory-mapped ring buffer trace file."""
+import mmap
+import os
+import struct
+import weakref
+from itertools import count
+
+MAGIC = b'PYDECOTR'
+VERSION = 1
+# magic, version, record size, capacity
+HEADER = struct.Struct('<8sIIQ')
+# sequence number (starting at 1), start, duration, pid, tid, name
+RECORD = struct.Struct('<Qddqq40s')
+
+# open sinks, reset in forked children so that they write to their own file
+_sinks = weakref.WeakSet()
+# numbers of sink copies (see `MmapTraceSink.filename`)
+_copies = count(1)
+
+
+def _reset_sinks():
+    for sink in list(_sinks):
+        sink._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_sinks)
+
+
+class MmapTraceSink(object):
+    """Trace sink writing fixed-size binary call records to a mapped file.
+
+    Records are written into a ring buffer of ``capacity`` slots backed by a
+    memory-mapped file: writing a record is a single :func:`struct.pack_into`
+    and records survive a crash of the writing process. The file is opened
+    lazily on first write and can be decoded offline with
+    :func:`read_trace_file`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the trace file. It is formatted with the process id (ex:
+        ``'trace-{pid}.bin'``) so that each process writes its own file. If
+        it does not depend on the process id, other processes (ex: forked
+        workers) write to the path suffixed with their id (ex:
+        ``'trace.bin.1234'``). Copies of the sink (ex: pickled or deep-copied
+        along with a :class:`pydeco.decorators.Tracer`) write to their own
+        file, suffixed with a copy number (ex: ``'trace-1234.bin.copy1'``).
+    capacity : int
+        Number of record slots of the ring buffer.
+
+    """
+
+    def __init__(self, path, capacity=65536):
+        if capacity < 1:
+            raise ValueError('`capacity` should be a positive integer.')
+        self.path = path
+        self.capacity = capacity
+        # process writing to `path` (if it does not depend on the process id)
+        self._owner = os.getpid()
+        self._copy = None
+        self._names = dict()
+        self._reset()
+
+    def __repr__(self):
+        """Return the string representation."""
+        return 'MmapTraceSink(path={!r}, capacity={})'.format(
+            self.path, self.capacity)
+
+    def __getstate__(self):
+        """Return state (without file handles)."""
+        return {'path': self.path, 'capacity': self.capacity,
+                '_owner': self._owner}
+
+    def __setstate__(self, state):
+        """Restore state."""
+        self.__dict__.update(state)
+        self._copy = next(_copies)
+        self._names = dict()
+        self._reset()
+
+    def _reset(self):
+        self._file = None
+        self._mm = None
+        self._cursor = count(1)
+        _sinks.discard(self)
+
+    @property
+    def filename(self):
+        """Return path of the trace file of the current process."""
+        pid = os.getpid()
+        filename = self.path.format(pid=pid)
+        if pid != self._owner and filename == self.path.format(
+                pid=self._owner):
+            # do not truncate the file of the owner process
+            filename = '{}.{}'.format(filename, pid)
+        if self._copy is not None:
+            # copies never write to the file of the original sink
+            filename = '{}.copy{}'.format(filename, self._copy)
+        return filename
+
+    def open(self):
+        """Create (or truncate) trace file and map it into memory."""
+        size = HEADER.size + self.capacity * RECORD.size
+        self._file = open(self.filename, 'w+b')
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD.size,
+                         self.capacity)
+        self._cursor = count(1)
+        _sinks.add(self)
+
+    def write(self, name, pid, tid, start, duration):
+        """Write a call record."""
+        if self._mm is None:
+            self.open()
+        encoded = self._names.get(name)
+        if encoded is None:
+            encoded = self._names[name] = name.encode('utf-8')[:40]
+        seq = next(self._cursor)
+        RECORD.pack_into(
+            self._mm, HEADER.size + ((seq - 1) % self.capacity) * RECORD.size,
+            seq, start, duration, pid, tid, encoded)
+
+    def read(self):
+        """Return written records (see :func:`read_trace_file`)."""
+        if self._mm is None:
+            return []
+        return _decode(self._mm)
+
+    def clear(self):
+        """Clear written records."""
+        if self._mm is not None:
+            self.close()
+            self.open()
+
+    def flush(self):
+        """Flush written records to disk."""
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self):
+        """Flush written records and close trace file."""
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+        self._reset()
+
+
+def _decode(buffer):
+    magic, version, record_size, capacity = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a pydeco trace file.')
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError('Unsupported trace file version {}.'.format(version))
+    records = []
+    for i in range(capacity):
+        seq, start, duration, pid, tid, name = RECORD.unpack_from(
+            buffer, HEADER.size + i * RECORD.size)
+        if seq == 0:  # empty slot
+            continue
+        records.append(
+            (seq, name.rstrip(b'\0').decode('utf-8', 'replace'), pid, tid,
+             start, duration))
+    records.sort()
+    return [record[1:] for record in records]
+
+
+def read_trace_file(path):
+    """Decode a trace file written by :class:`MmapTraceSink`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the trace file.
+
+    Returns
+    -------
+    records : list of tuple
+        Records as (name, pid, tid, start, duration) tuples, from the oldest
+        to the most recent one.
+
+    """
+    with open(path, 'rb') as file:
+        buffer = file.read()
+    return _decode(buffer)
@@ -0,0 +1,80 @@
+"""Test AsyncTimer decorator."""
+import asyncio
+import time
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import AsyncTimer
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    async def method_1(self):
+        await asyncio.sleep(.03)
+        return 1
+
+    async def method_2(self):
+        time.sleep(.03)  # blocks the event loop
+        await asyncio.sleep(0)
+        return 2
+
+    async def method_3(self):
+        await asyncio.sleep(0)
+        raise RuntimeError('method_3 failed')
+
+    def method_4(self):
+        return 4
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_async_timer():
+    """Test on-loop vs suspended time measurement."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = AsyncTimer(block_threshold=.01, verbose=False)
+    MyClass_deco = MethodsDecorator(
+        mapping={timer: ['method_1', 'method_2', 'method_3', 'method_4']})(
+            MyClass)
+    instance = MyClass_deco()
+
+    async def main():
+        results = await asyncio.gather(
+            asyncio.create_task(instance.method_1()), instance.method_2())
+        with pytest.raises(RuntimeError, match='method_3 failed'):
+            await instance.method_3()
+        return results
+
+    assert asyncio.run(main()) == [1, 2]
+    assert instance.method_4() == 4
+
+    wall, on_loop, suspended = timer.split('method_1')
+    assert wall >= 30 and on_loop < 10 and suspended > 20
+    wall, on_loop, suspended = timer.split('method_2')
+    assert wall >= 30 and on_loop >= 30
+    assert timer.blocking_by_func == {'method_2': 1}
+    assert timer.max_step_by_func['method_2'] >= 30
+    assert timer.run_by_func['method_3'] == 1
+    assert timer.run_by_func['method_4'] == 1
+
+    with pytest.raises(ValueError, match='No call recorded'):
+        timer.split('method_5')
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
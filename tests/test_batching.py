@@ -0,0 +1,196 @@
+"""Test Batcher and AsyncBatcher decorators."""
+import asyncio
+import threading
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import AsyncBatcher, Batcher
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, x):
+        return self.predict_batch([x])[0]
+
+    def predict_batch(self, xs):
+        if any(x < 0 for x in xs):
+            raise ValueError('Negative input.')
+        self.batches.append(list(xs))
+        return [2 * x for x in xs]
+
+
+class MyAsyncClass():
+    """Custom class with coroutine methods."""
+
+    def __init__(self):
+        self.batches = []
+        self.depths = []
+
+    async def predict(self, x):
+        return (await self.predict_batch([x]))[0]
+
+    async def predict_batch(self, xs):
+        self.batches.append(list(xs))
+        self.depths.append(self.batcher.queue_depth('predict'))
+        await asyncio.sleep(.001)
+        if any(x < 0 for x in xs):
+            raise ValueError('Negative input.')
+        return [2 * x for x in xs]
+
+
+def call_concurrently(method, inputs):
+    """Call `method` on each input from a distinct thread."""
+    outputs = [None] * len(inputs)
+    barrier = threading.Barrier(len(inputs))
+
+    def run(i):
+        barrier.wait()
+        try:
+            outputs[i] = method(inputs[i])
+        except Exception as exc:
+            outputs[i] = exc
+
+    threads = [threading.Thread(target=run, args=(i, ))
+               for i in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outputs
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_batcher():
+    """Test coalescing concurrent calls."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    with pytest.raises(ValueError, match='`max_batch_size`'):
+        Batcher('predict_batch', max_batch_size=0)
+
+    # batches are closed once full
+    batcher = Batcher('predict_batch', max_batch_size=4, max_delay=10.)
+    MyClass_deco = MethodsDecorator(mapping={batcher: 'predict'})(MyClass)
+    instance = MyClass_deco()
+
+    assert call_concurrently(instance.predict, range(8)) == [
+        2 * i for i in range(8)]
+    assert sorted(len(batch) for batch in instance.batches) == [4, 4]
+    assert batcher.run_by_func == {'predict': 8}
+    assert batcher.batch_by_func == {'predict': 2}
+    assert batcher.batch_size_by_func['predict'].mean == 4
+
+    # errors are raised to all callers of the batch
+    outputs = call_concurrently(instance.predict, [1, 2, 3, -1])
+    assert all(isinstance(out, ValueError) for out in outputs)
+
+    # batches are run after `max_delay`
+    batcher.max_delay = .01
+    assert instance.predict(3) == 6
+    assert instance.batches[-1] == [3]
+    # calls with other arguments are not batched
+    with pytest.raises(TypeError):
+        instance.predict(1, 2)
+    assert batcher.batch_by_func == {'predict': 4}
+
+    unregister_all()
+
+
+def test_batcher_outputs():
+    """Test batched methods returning a wrong number of outputs."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    batcher = Batcher(lambda instance, xs: xs[:1], max_delay=0.)
+    MyClass_deco = MethodsDecorator(mapping={batcher: 'predict'})(MyClass)
+    instance = MyClass_deco()
+    assert instance.predict(5) == 5
+    batcher.max_batch_size = 2
+    batcher.max_delay = 10.
+    outputs = call_concurrently(instance.predict, [1, 2])
+    assert all(isinstance(out, ValueError) and 'returned 1 outputs' in str(out)
+               for out in outputs)
+
+    unregister_all()
+
+
+def test_async_batcher():
+    """Test coalescing concurrent coroutine calls."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    with pytest.raises(ValueError, match='`max_queue_size`'):
+        AsyncBatcher('predict_batch', max_queue_size=0)
+
+    batcher = AsyncBatcher('predict_batch', max_batch_size=4)
+    MyClass_deco = MethodsDecorator(mapping={batcher: 'predict'})(
+        MyAsyncClass)
+    instance = MyClass_deco()
+    instance.batcher = batcher
+
+    async def gather(inputs):
+        return await asyncio.gather(
+            *[instance.predict(x) for x in inputs], return_exceptions=True)
+
+    # calls of the same loop iteration are batched
+    assert asyncio.run(gather(range(10))) == [2 * x for x in range(10)]
+    assert instance.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert batcher.batch_by_func == {'predict': 3}
+    assert batcher.wait_by_func['predict'].count == 10
+    assert batcher.queue_depth('predict') == 0
+
+    # errors are raised to all callers of the batch
+    outputs = asyncio.run(gather([1, -1]))
+    assert all(isinstance(out, ValueError) for out in outputs)
+
+    # backpressure: bounded number of pending calls
+    batcher.max_batch_size = 1
+    batcher.max_queue_size = 2
+    instance.depths = []
+    instance.batches = []
+    n_batches = batcher.batch_by_func['predict']
+    assert asyncio.run(gather(range(6))) == [2 * x for x in range(6)]
+    assert max(instance.depths) <= 2
+    assert instance.batches == [[x] for x in range(6)]
+    assert batcher.batch_by_func['predict'] == n_batches + 6
+
+    # batches wait up to `max_delay` for other calls
+    async def staggered():
+        first = asyncio.ensure_future(instance.predict(1))
+        await asyncio.sleep(.005)
+        return await asyncio.gather(first, instance.predict(2))
+
+    batcher.max_batch_size = 4
+    batcher.max_delay = .1
+    instance.batches = []
+    assert asyncio.run(staggered()) == [2, 4]
+    assert instance.batches == [[1, 2]]
+    names = set(metric.name for metric in batcher.metrics())
+    assert {'batch_size', 'batch_latency_seconds',
+            'batch_wait_seconds'} <= names
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,138 @@
+"""Test calibration of decorators overhead."""
+import warnings
+
+import pytest
+
+from pydeco import Decorator, MethodsDecorator
+from pydeco.decorators import (AsyncConcurrencyLimiter, AsyncTimer, Batcher,
+                               CallGraphProfiler, ConcurrencyLimiter,
+                               MemoryProfiler, ScalingProfiler, Timer, Tracer)
+from pydeco.utils import calibrate
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom func decorators
+# -------------------------------
+
+class Decorator1(Decorator):
+    """Decorator 1."""
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Call func."""
+        return func(instance, *args, **kwargs)
+
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+    def method_2(self, *args, **kwargs):
+        pass
+
+    async def method_3(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_calibrate():
+    """Test overhead calibration of a decorators stack."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    decorator_1 = Decorator1()
+    timer = Timer()
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator_1: 'method_1',
+                 timer: ['method_1', 'method_2']})(MyClass)
+
+    with pytest.raises(ValueError, match='not wrapped'):
+        calibrate(MyClass)
+
+    overheads = calibrate(MyClass_deco, n_calls=1000, repeat=3)
+    assert set(overheads) == {'method_1', 'method_2'}
+    assert overheads['method_1'] > 0 and overheads['method_2'] > 0
+
+    # timer overhead includes inner decorator on method_1 only
+    assert (timer.overhead_by_func['method_1'] >
+            timer.overhead_by_func['method_2'] > 0)
+    # calibration does not record anything in actual decorators
+    assert timer.run == 0 and decorator_1.instances == []
+
+    instance = MyClass_deco()
+    for _ in range(100):
+        instance.method_1()
+    assert 0 <= timer.corrected_total_runtime < timer.total_runtime
+    assert (timer.corrected_runtime_by_func['method_1'] <
+            timer.runtime_by_func['method_1'])
+
+    unregister_all()
+
+
+def test_calibrate_builtins(tmp_path):
+    """Test calibration of decorators holding locks, files and buffers."""
+    from pydeco.utils.parser import CONFIG
+    from pydeco.utils.tracefile import MmapTraceSink
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    sink = MmapTraceSink(str(tmp_path / 'trace.bin'), capacity=16)
+    tracer = Tracer(sink=sink)
+    decorators = [ConcurrencyLimiter(2), CallGraphProfiler(),
+                  MemoryProfiler(), tracer, Batcher('method_2')]
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator: 'method_1' for decorator in decorators})(MyClass)
+
+    instance = MyClass_deco()
+    for _ in range(3):
+        instance.method_1()
+    assert len(tracer.records) == 3
+
+    overheads = calibrate(MyClass_deco, n_calls=100, repeat=2)
+    assert set(overheads) == {'method_1'}
+    # calls of the probe are not recorded in the trace file
+    assert len(tracer.records) == 3
+
+    unregister_all()
+
+
+def test_calibrate_unprobeable():
+    """Test calibration of decorators that cannot be probed."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer_1, timer_2 = Timer(), Timer()
+    MyClass_deco = MethodsDecorator(
+        mapping={timer_1: 'method_1',
+                 ScalingProfiler(size=lambda n: n): ['method_1', 'method_2'],
+                 AsyncConcurrencyLimiter(2): 'method_3',
+                 AsyncTimer(): 'method_3',
+                 timer_2: 'method_2'})(MyClass)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        overheads = calibrate(MyClass_deco, n_calls=100, repeat=2)
+    assert set(overheads) == {'method_1', 'method_2'}
+    # decorators applied before the profiler are calibrated
+    assert timer_1.overhead_by_func['method_1'] > 0
+    assert 'method_2' not in timer_2.overhead_by_func
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
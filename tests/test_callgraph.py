@@ -0,0 +1,91 @@
+"""Test CallGraphProfiler decorator."""
+from copy import deepcopy
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import CallGraphProfiler
+from pydeco.decorators import callgraph as callgraph_module
+from pydeco.utils.register import unregister_all
+
+# fake clock (in s) advanced by methods of `MyClass`
+clock = [0.]
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        clock[0] += .01
+        self.method_2()
+
+    def method_2(self, *args, **kwargs):
+        clock[0] += .02
+
+    def method_3(self, n=2):
+        if n > 0:
+            self.method_3(n - 1)
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_call_graph_profiler(monkeypatch):
+    """Test self and cumulative time attribution."""
+    # deterministic durations
+    monkeypatch.setattr(callgraph_module, 'perf_counter', lambda: clock[0])
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = 1
+
+    unregister_all()
+
+    profiler = CallGraphProfiler()
+    MyClass_deco = MethodsDecorator(
+        mapping={profiler: ['method_1', 'method_2', 'method_3']})(MyClass)
+    instance = MyClass_deco()
+    instance_2 = deepcopy(instance)
+
+    instance.method_1()
+    instance.method_2()
+
+    calls_1, self_1, cum_1 = profiler.stats['MyClass.method_1']
+    calls_2, self_2, cum_2 = profiler.stats['MyClass.method_2']
+    assert calls_1 == 1 and calls_2 == 2
+    assert self_1 == pytest.approx(.01) and cum_1 == pytest.approx(.03)
+    assert self_2 == pytest.approx(cum_2) == pytest.approx(.04)
+    assert profiler.edges[('MyClass.method_1', 'MyClass.method_2')][0] == 1
+    assert profiler.edges[('<root>', 'MyClass.method_2')][0] == 1
+    assert profiler.edges[('<root>', 'MyClass.method_1')][0] == 1
+
+    # recursive calls: cumulative time only accounted once
+    instance.method_3()
+    calls_3, self_3, cum_3 = profiler.stats['MyClass.method_3']
+    assert calls_3 == 3
+    assert self_3 == pytest.approx(cum_3)
+
+    graph = profiler.call_graph()
+    assert len(graph['nodes']) == 3 and len(graph['edges']) == 5
+    dot = profiler.to_dot()
+    assert dot.startswith('digraph')
+    assert '"MyClass.method_1" -> "MyClass.method_2"' in dot
+
+    # profiler can be deep-copied along with the instance
+    instance_2.method_2()
+    assert instance_2.decorators['CallGraphProfiler'].stats == {
+        'MyClass.method_2': [1, pytest.approx(.02), pytest.approx(.02)]}
+    assert profiler.stats['MyClass.method_2'][0] == 2
+
+    profiler.clear()
+    assert profiler.stats == {} and profiler.edges == {}
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
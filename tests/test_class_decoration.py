@@ -338,10 +338,12 @@ def test_pickling(dcopy, verbose=True):
 
     # check that `instance` and `instance_2` are distinct objects
     assert instance is not instance_2
-    # check that decorators of `instance` and `instance_2` are distinct objects
+    # check that decorators are pickled by reference: `instance_2` shares the
+    # decorators of `instance_` (distinct from those of `instance` if copied)
     for (deco1_name, deco1), (deco2_name, deco2) in zip(
             instance.decorators.items(), instance_2.decorators.items()):
-        assert deco1 is not deco2
+        assert (deco1 is not deco2) if dcopy else (deco1 is deco2)
+    assert instance_2.decorators == instance_.decorators
 
     assert instance.cnt_dec_1 == 0 and instance.cnt_dec_2 == 0
     assert instance_2.cnt_dec_1 == 0 and instance_2.cnt_dec_2 == 0
@@ -466,5 +468,196 @@ def test_parallelizing(copy, n_iter, n_jobs=1, verbose=True):
     unregister_all()
 
 
+def test_bulk_activation():
+    """Test constant time activation of decorators for all instances."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    global logs
+    logs = []
+
+    decorator_1 = Decorator1(name='decorator_1')
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator_1: ['method_1', 'method_2']})(MyClass)
+    instances = [MyClass_deco() for _ in range(1000)]
+    for instance in instances:
+        instance.method_1()
+
+    # bulk deactivation does not visit instances
+    decorator_1.deactivate()
+    assert not any(instance.is_decorator_active('Decorator1') or
+                   instance.active_decorators['Decorator1'] or
+                   decorator_1.is_active(instance) for instance in instances)
+    for instance in instances:
+        instance.method_1()
+    assert all(instance.cnt_dec_1 == 1 for instance in instances)
+
+    # per-instance states set after a bulk change take precedence...
+    instances[0].activate_decorator('Decorator1')
+    instances[0].method_1()
+    instances[1].method_1()
+    assert instances[0].cnt_dec_1 == 2 and instances[1].cnt_dec_1 == 1
+
+    # ... until the next bulk change
+    decorator_1.activate()
+    instances[1].deactivate_decorator('Decorator1')
+    for instance in instances:
+        instance.method_1()
+    assert instances[0].cnt_dec_1 == 3 and instances[1].cnt_dec_1 == 1
+    assert all(instance.cnt_dec_1 == 2 for instance in instances[2:])
+    decorator_1.activate()
+    assert instances[1].is_decorator_active('Decorator1')
+
+    unregister_all()
+
+
+def test_method_activation():
+    """Test activation of decorators by method, class and instance."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    global logs
+    logs = []
+
+    class MyOtherClass(MyClass):
+        pass
+
+    decorator_1 = Decorator1(name='decorator_1')
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator_1: ['method_1', 'method_2']})(MyClass)
+    MyOtherClass_deco = MethodsDecorator(
+        mapping={decorator_1: ['method_1', 'method_2']})(MyOtherClass)
+    instance_1, instance_2 = MyClass_deco(), MyClass_deco()
+    instance_3 = MyOtherClass_deco()
+
+    def run():
+        counts = []
+        for instance in (instance_1, instance_2, instance_3):
+            cnt = instance.cnt_dec_1
+            instance.method_1()
+            instance.method_2()
+            counts.append(instance.cnt_dec_1 - cnt)
+        return counts
+
+    # decorator-wide scope, per method
+    decorator_1.deactivate(methods='method_2')
+    assert run() == [1, 1, 1]
+    assert decorator_1.is_active(instance_1, 'method_1')
+    assert not decorator_1.is_active(instance_1, 'method_2')
+    with pytest.raises(ValueError, match='does not decorate method'):
+        decorator_1.deactivate(methods='method_3')
+
+    # class-wide scope
+    decorator_1.deactivate(cls=MyOtherClass_deco)
+    decorator_1.activate(methods='method_2', cls=MyClass)
+    assert run() == [2, 2, 0]
+
+    # instance-wide scope
+    instance_2.deactivate_decorator('Decorator1', methods=['method_1'])
+    assert run() == [2, 1, 0]
+    assert instance_2.is_decorator_active('Decorator1')
+    assert not instance_2.is_decorator_active('Decorator1', 'method_1')
+    with decorator_1.override(active=True):
+        assert instance_2.is_decorator_active('Decorator1', 'method_1')
+    with pytest.raises(ValueError):
+        instance_2.deactivate_decorator('Decorator1', methods='method_3')
+
+    # the most recent state wins
+    decorator_1.activate(methods='method_1')
+    assert run() == [2, 2, 1]
+    instance_2.deactivate_decorator('Decorator1')
+    assert run() == [2, 0, 1]
+    decorator_1.activate()
+    assert run() == [2, 2, 2]
+
+    unregister_all()
+
+
+def test_disable(monkeypatch):
+    """Test that decoration is a no-op when disabled."""
+    from pydeco.utils.parser import CONFIG, parse_config
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    monkeypatch.setenv('PYDECO_DISABLE', '1')
+    assert parse_config()['DISABLE']
+    monkeypatch.setenv('PYDECO_DISABLE', '0')
+    assert not parse_config()['DISABLE']
+
+    monkeypatch.setitem(CONFIG, 'DISABLE', True)
+    decorator_1 = Decorator1(name='decorator_1')
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator_1: ['method_1', 'method_2']})(MyClass)
+    assert MyClass_deco.method_1 is MyClass.method_1
+    assert decorator_1(MyClass.method_1) is MyClass.method_1
+
+    # the control API is callable
+    instance = MyClass_deco()
+    instance.method_1()
+    instance.deactivate_decorator('Decorator1')
+    instance.activate_decorator('Decorator1', methods='method_1')
+    decorator_1.activate()
+    assert not instance.is_decorator_active('Decorator1')
+    assert not decorator_1.is_active(instance)
+    assert instance.cnt_dec_1 == 0 and decorator_1.instances == []
+
+    # instances of the class decorated in functional form are picklable
+    instance_ = pkl.loads(pkl.dumps(instance))
+    assert isinstance(instance_, MyClass_deco)
+
+    # the flag is read when decorating
+    monkeypatch.setitem(CONFIG, 'DISABLE', False)
+    assert not decorator_1.is_active(instance)
+
+    unregister_all()
+
+
+def test_pickle_size():
+    """Test that pickling adds a small constant overhead to instances."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    global logs
+    logs = []
+
+    MyClass_deco = MethodsDecorator(
+        mapping={
+            Decorator1(name='decorator_1'): ['method_1', 'method_2'],
+            Decorator2(name='decorator_2'): 'method_1'
+        })(MyClass)
+    instance = MyClass_deco()
+    size = len(pkl.dumps(instance))
+    # overhead over the undecorated instance
+    assert size - len(pkl.dumps(MyClass())) < 256
+
+    for _ in range(100):
+        instance.method_1()
+        instance.method_2()
+    # decorators bookkeeping is not pickled
+    assert len(pkl.dumps(instance)) == size
+    instance_2 = pkl.loads(pkl.dumps(instance))
+    assert instance_2.decorators == instance.decorators
+    assert instance_2.cnt_dec_1 == 200 and instance_2.cnt_dec_2 == 100
+
+    # pickling decorators along with instances
+    CONFIG['PICKLE_DECORATORS'] = True
+    try:
+        instance_2 = pkl.loads(pkl.dumps(instance))
+    finally:
+        CONFIG['PICKLE_DECORATORS'] = False
+    for name, decorator in instance_2.decorators.items():
+        assert decorator is not instance.decorators[name]
+        assert decorator.instances == []
+
+    unregister_all()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
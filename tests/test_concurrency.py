@@ -0,0 +1,207 @@
+"""Test concurrency-limiting decorators."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import AsyncConcurrencyLimiter, ConcurrencyLimiter
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class tracking concurrent calls."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.order = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+
+    def _enter(self, i):
+        with self.lock:
+            self.order.append(i)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def _exit(self):
+        with self.lock:
+            self.running -= 1
+
+    def method_1(self, i):
+        self._enter(i)
+        time.sleep(.01)
+        self._exit()
+        return i
+
+    def method_2(self, i):
+        self._enter(i)
+        self.release.wait()
+        self._exit()
+        return i
+
+    async def method_3(self, i):
+        self._enter(i)
+        await asyncio.sleep(.005)
+        self._exit()
+        return i
+
+
+def start_thread(target, *args):
+    """Start a thread running target(*args)."""
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_concurrency_limiter():
+    """Test capping in-flight calls with fair queueing."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    with pytest.raises(ValueError, match='`max_concurrency`'):
+        ConcurrencyLimiter(0)
+    with pytest.raises(ValueError, match='`scope`'):
+        ConcurrencyLimiter(1, scope='thread')
+
+    limiter = ConcurrencyLimiter(2)
+    MyClass_deco = MethodsDecorator(
+        mapping={limiter: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+
+    threads = [start_thread(instance.method_1, i) for i in range(8)]
+    for thread in threads:
+        thread.join()
+    assert instance.max_running == 2
+    assert limiter.run_by_func['method_1'] == 8
+    assert limiter.wait_by_func['method_1'].count == 8
+    assert limiter.wait_by_func['method_1'].max >= 10
+    assert 1 <= limiter.max_depth_by_func['method_1'] <= 6
+    assert limiter.depth_by_func['method_1'] == 0
+    assert limiter.in_flight_by_func['method_1'] == 0
+
+    # waiting calls get released slots in arrival order
+    limiter.max_concurrency = 1
+    limiter._semaphores.clear()
+    instance.order = []
+    threads = [start_thread(instance.method_2, 0)]
+    while instance.order != [0]:
+        time.sleep(.001)
+    for i in range(1, 6):
+        threads.append(start_thread(instance.method_2, i))
+        while limiter.depth_by_func.get('method_2', 0) < i:
+            time.sleep(.001)
+    assert limiter.in_flight_by_func['method_2'] == 1
+    instance.release.set()
+    for thread in threads:
+        thread.join()
+    assert instance.order == list(range(6))
+    assert limiter.max_depth_by_func['method_2'] == 5
+
+    names = set(metric.name for metric in limiter.metrics())
+    assert names == {'limited_calls', 'queue_wait_seconds', 'queue_depth',
+                     'max_queue_depth', 'in_flight_calls'}
+
+    unregister_all()
+
+
+def test_concurrency_limiter_instance_scope():
+    """Test capping in-flight calls of each instance."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    limiter = ConcurrencyLimiter(1, scope='instance')
+    MyClass_deco = MethodsDecorator(
+        mapping={limiter: ['method_1', 'method_2']})(MyClass)
+    instance_1, instance_2 = MyClass_deco(), MyClass_deco()
+    instance_1.release.set()
+    instance_2.release.set()
+    # methods of an instance share the cap, instances do not
+    threads = [start_thread(method, i) for i in range(3) for method in (
+        instance_1.method_1, instance_1.method_2, instance_2.method_1)]
+    for thread in threads:
+        thread.join()
+    assert instance_1.max_running == 1 and instance_2.max_running == 1
+    # semaphores of instances are only kept during calls
+    assert limiter._semaphores == {} and limiter._users == {}
+    instance_1.release.clear()
+    thread = start_thread(instance_1.method_2, 3)
+    while instance_1.running == 0:
+        time.sleep(.001)
+    assert list(limiter._semaphores) == [id(instance_1)]
+    instance_1.release.set()
+    thread.join()
+    assert limiter._semaphores == {} and limiter._users == {}
+
+    unregister_all()
+
+
+def test_async_concurrency_limiter():
+    """Test capping in-flight coroutine calls."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    limiter = AsyncConcurrencyLimiter(2)
+    MyClass_deco = MethodsDecorator(mapping={limiter: 'method_3'})(MyClass)
+    instance = MyClass_deco()
+
+    async def main():
+        return await asyncio.gather(*[instance.method_3(i) for i in range(6)])
+
+    assert asyncio.run(main()) == list(range(6))
+    assert instance.max_running == 2
+    assert instance.order == list(range(6))
+    assert limiter.max_depth_by_func['method_3'] == 4
+    assert limiter.wait_by_func['method_3'].count == 6
+
+    # cancelled waiting calls leave the queue
+    async def cancel():
+        tasks = [asyncio.ensure_future(instance.method_3(i))
+                 for i in range(4)]
+        await asyncio.sleep(0)
+        tasks[2].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    outputs = asyncio.run(cancel())
+    assert isinstance(outputs[2], asyncio.CancelledError)
+    assert [outputs[i] for i in (0, 1, 3)] == [0, 1, 3]
+    assert limiter.depth_by_func['method_3'] == 0
+    assert limiter._semaphores['method_3'].value == 2
+
+    # cancelled waiting calls already dropped by a release
+    semaphore = limiter._semaphore_class(1)
+
+    async def cancel_released():
+        semaphore.acquire_nowait()
+        task = asyncio.ensure_future(semaphore.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        semaphore.release()
+        return await asyncio.gather(task, return_exceptions=True)
+
+    outputs = asyncio.run(cancel_released())
+    assert isinstance(outputs[0], asyncio.CancelledError)
+    assert semaphore.value == 1 and not semaphore.waiters
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
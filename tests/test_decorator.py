@@ -149,5 +149,139 @@ def test_decoration(verbose=False):
     assert instance.cnt_dec_1 == 2 and instance.cnt_dec_2 == 1
 
 
+def test_without_base_init():
+    """Test decorators whose subclass does not call `Decorator.__init__`."""
+
+    class Decorator3(Decorator):
+
+        def __init__(self):
+            self.instances = []
+
+        def wrapper(self, instance, func, *args, **kwargs):
+            instance.cnt_dec_1 += 1
+            return func(instance, *args, **kwargs)
+
+    class MyOtherClass():
+
+        def __init__(self):
+            self.cnt_dec_1 = 0
+
+        def method_1(self):
+            pass
+
+    decorator_3 = Decorator3()
+    MyOtherClass.method_1 = decorator_3(MyOtherClass.method_1)
+    instance = MyOtherClass()
+    instance.method_1()
+    instance.method_1()
+    assert instance.cnt_dec_1 == 2
+    assert decorator_3.instances == [instance]
+    assert decorator_3.is_active(instance)
+
+
+def test_sampling():
+    """Test call sampling."""
+    import random
+
+    class MyOtherClass():
+
+        def __init__(self):
+            self.cnt_dec_1 = 0
+
+        def method_1(self):
+            pass
+
+    # sample one call out of 4
+    decorator_1 = Decorator1(name='decorator_1')
+    decorator_1.set_sampling(every=4)
+    MyOtherClass.method_1 = decorator_1(MyOtherClass.method_1)
+    instance = MyOtherClass()
+    for _ in range(20):
+        instance.method_1()
+    assert decorator_1.sample_weight == 4
+    assert instance.cnt_dec_1 == 5
+
+    # sample calls with probability .1
+    random.seed(0)
+    decorator_1.set_sampling(rate=.1)
+    instance = MyOtherClass()
+    for _ in range(10000):
+        instance.method_1()
+    assert decorator_1.sample_weight == 10
+    assert 800 < instance.cnt_dec_1 < 1200
+
+    # disable sampling
+    decorator_1.set_sampling()
+    instance = MyOtherClass()
+    for _ in range(20):
+        instance.method_1()
+    assert instance.cnt_dec_1 == 20
+
+    with pytest.raises(ValueError, match='cannot be both set'):
+        decorator_1.set_sampling(every=2, rate=.5)
+    with pytest.raises(ValueError, match='positive integer'):
+        Decorator(sample_every=0)
+    with pytest.raises(ValueError, match='should be in'):
+        Decorator(sample_rate=1.5)
+
+
+def test_override():
+    """Test context-local activation overrides."""
+    import asyncio
+    import threading
+
+    class MyOtherClass():
+
+        def __init__(self):
+            self.cnt_dec_1 = 0
+
+        def method_1(self):
+            pass
+
+        async def method_2(self):
+            await asyncio.sleep(.01)
+
+    decorator_1 = Decorator1(name='decorator_1')
+    MyOtherClass.method_1 = decorator_1(MyOtherClass.method_1)
+    MyOtherClass.method_2 = decorator_1(MyOtherClass.method_2)
+    instance = MyOtherClass()
+
+    with decorator_1.override(active=False):
+        instance.method_1()
+        assert instance.cnt_dec_1 == 0
+
+        # other threads are unaffected
+        thread = threading.Thread(target=instance.method_1)
+        thread.start()
+        thread.join()
+        assert instance.cnt_dec_1 == 1
+
+        with decorator_1.override(active=True):
+            instance.method_1()
+            assert instance.cnt_dec_1 == 2
+        instance.method_1()
+        assert instance.cnt_dec_1 == 2
+    instance.method_1()
+    assert instance.cnt_dec_1 == 3
+
+    # activation states reflect overrides
+    decorator_1.deactivate()
+    with decorator_1.override(active=True):
+        assert decorator_1.is_active(instance)
+    assert not decorator_1.is_active(instance)
+    decorator_1.activate()
+
+    # overrides apply to the current task only
+    async def request(active):
+        with decorator_1.override(active=active):
+            await instance.method_2()
+
+    async def main():
+        await asyncio.gather(request(False), request(False), request(True))
+
+    asyncio.run(main())
+    assert instance.cnt_dec_1 == 4
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,110 @@
+"""Test EventEmitter decorator."""
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import CallEvent, EventEmitter
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+    def method_2(self, *args, **kwargs):
+        raise RuntimeError('method_2 failed')
+
+    def method_3(self, *args, **kwargs):
+        return 3
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_event_emitter():
+    """Test event emission and batching."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    emitter = EventEmitter(batch_size=4)
+    MyClass_deco = MethodsDecorator(
+        mapping={emitter: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+
+    # no subscriber: no event is built
+    instance.method_1()
+    assert len(emitter._events) == 0
+
+    batches = []
+    emitter.subscribe(batches.append)
+
+    instance.method_1()
+    assert batches == []  # batch not full yet
+    instance.method_1()
+    assert len(batches) == 1 and len(batches[0]) == 4
+    assert [event.kind for event in batches[0]] == [
+        'start', 'end', 'start', 'end']
+    event = batches[0][1]
+    assert isinstance(event, CallEvent)
+    assert event.method == 'method_1'
+    assert event.instance_id == id(instance)
+    assert event.duration >= 0
+
+    with pytest.raises(RuntimeError, match='method_2 failed'):
+        instance.method_2()
+    emitter.flush()
+    assert len(batches) == 2
+    assert [event.kind for event in batches[1]] == ['start', 'exception']
+    assert isinstance(batches[1][1].exception, RuntimeError)
+
+    # unsubscribing flushes pending events
+    instance.method_1()
+    emitter.unsubscribe(batches.append)
+    assert len(batches) == 3 and len(batches[2]) == 2
+    instance.method_1()
+    assert len(emitter._events) == 0
+
+    unregister_all()
+
+
+def test_failing_subscriber():
+    """Test that subscriber failures do not affect decorated methods."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    emitter = EventEmitter(batch_size=1)
+    MyClass_deco = MethodsDecorator(
+        mapping={emitter: ['method_2', 'method_3']})(MyClass)
+    instance = MyClass_deco()
+
+    def fail(events):
+        raise ValueError('subscriber failed')
+
+    batches = []
+    emitter.subscribe(fail)
+    emitter.subscribe(batches.append)
+
+    # events are dispatched on 'start' and 'end' emits
+    assert instance.method_3() == 3
+    with pytest.raises(RuntimeError, match='method_2 failed'):
+        instance.method_2()
+    # other subscribers still receive events
+    assert [batch[0].kind for batch in batches] == [
+        'start', 'end', 'start', 'exception']
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
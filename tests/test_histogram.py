@@ -0,0 +1,109 @@
+"""Test histogram."""
+import random
+from copy import deepcopy
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Timer
+from pydeco.utils import Histogram
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_histogram():
+    """Test histogram recording and percentiles."""
+    random.seed(0)
+    values = [random.expovariate(1.) for _ in range(10000)]
+
+    histogram = Histogram(resolution=1e-6)
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    assert histogram.count == len(values)
+    assert histogram.min == values[0] and histogram.max == values[-1]
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+    for q, value in zip((50, 99, 99.9), histogram.percentiles((50, 99, 99.9))):
+        expected = values[int(q / 100 * len(values)) - 1]
+        assert value == pytest.approx(expected, rel=.02)
+
+    # exact values below 2 ** sub_bucket_bits
+    histogram = Histogram(resolution=1)
+    for value in range(100):
+        histogram.record(value)
+    assert histogram.percentile(50) == 49
+
+    # out of range values are counted in the last bucket
+    histogram = Histogram(resolution=1, max_bits=10)
+    histogram.record(10 ** 6)
+    assert histogram.counts[-1] == 1
+
+    assert Histogram().percentile(50) is None
+
+
+def test_histogram_merge():
+    """Test merging histograms."""
+    histogram_1, histogram_2 = Histogram(), Histogram()
+    for value in range(1000):
+        (histogram_1 if value % 2 else histogram_2).record(value)
+    histogram = deepcopy(histogram_1).merge(histogram_2)
+    assert histogram.count == 1000
+    assert histogram.min == 0 and histogram.max == 999
+    assert histogram.percentile(50) == pytest.approx(500, rel=.02)
+
+    with pytest.raises(ValueError, match='different parameters'):
+        histogram.merge(Histogram(resolution=.1))
+
+
+def test_timer_histogram():
+    """Test Timer histograms merged across copies of an instance."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = 1
+
+    unregister_all()
+
+    MyClass_deco = MethodsDecorator(
+        mapping={Timer(histogram=True): 'method_1'})(MyClass)
+    instance = MyClass_deco()
+    instance_2 = deepcopy(instance)
+
+    for _ in range(10):
+        instance.method_1()
+    for _ in range(5):
+        instance_2.method_1()
+
+    timer = instance.decorators['Timer']
+    timer_2 = instance_2.decorators['Timer']
+    assert timer is not timer_2
+    assert timer.histogram_by_func['method_1'].count == 10
+
+    timer.merge(timer_2)
+    assert timer.run == 15
+    assert timer.histogram_by_func['method_1'].count == 15
+    p50, p99 = timer.percentiles('method_1', (50, 99))
+    assert 0 <= p50 <= p99
+
+    with pytest.raises(ValueError, match='No histogram recorded'):
+        timer.percentiles('method_2')
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
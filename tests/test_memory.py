@@ -0,0 +1,118 @@
+"""Test MemoryProfiler decorator."""
+import threading
+import tracemalloc
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import MemoryProfiler
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def __init__(self):
+        self.data = []
+
+    def method_1(self, *args, **kwargs):
+        # keep 1 MB allocated
+        self.data.append(bytearray(10 ** 6))
+
+    def method_2(self, *args, **kwargs):
+        # temporarily allocate 2 MB
+        tmp = bytearray(2 * 10 ** 6)
+        del tmp
+        self.method_1()
+
+    def method_3(self, started, done):
+        started.set()
+        done.wait()
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_memory_profiler():
+    """Test allocation measurement."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    profiler = MemoryProfiler()
+    MyClass_deco = MethodsDecorator(
+        mapping={profiler: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+
+    # tracemalloc is off: nothing is measured
+    assert not tracemalloc.is_tracing()
+    instance.method_1()
+    assert profiler.run_by_func == {}
+
+    tracemalloc.start()
+    try:
+        instance.method_1()
+        instance.method_2()
+    finally:
+        tracemalloc.stop()
+
+    assert profiler.run_by_func == {'method_1': 2, 'method_2': 1}
+    assert profiler.allocated_by_func['method_1'] == pytest.approx(
+        2 * 10 ** 6, rel=.05)
+    assert profiler.allocated_by_func['method_2'] == pytest.approx(
+        10 ** 6, rel=.05)
+    if hasattr(tracemalloc, 'reset_peak'):
+        assert profiler.peak_by_func['method_2'] >= 2 * 10 ** 6
+        assert profiler.peak_by_func['method_1'] < 2 * 10 ** 6
+    assert [row[0] for row in profiler.top(1)] == ['method_1']
+
+    with pytest.raises(ValueError, match='`key` should be'):
+        profiler.top(key='calls')
+
+    unregister_all()
+
+
+def test_memory_profiler_threads():
+    """Test that calls are measured in one thread at a time."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    profiler = MemoryProfiler()
+    MyClass_deco = MethodsDecorator(
+        mapping={profiler: ['method_1', 'method_3']})(MyClass)
+    instance = MyClass_deco()
+
+    started, done = threading.Event(), threading.Event()
+    thread = threading.Thread(target=instance.method_3,
+                              args=(started, done))
+    tracemalloc.start()
+    try:
+        thread.start()
+        started.wait()
+        instance.method_1()
+        done.set()
+        thread.join()
+        instance.method_1()
+    finally:
+        tracemalloc.stop()
+
+    # overlapping calls are not recorded
+    assert profiler.skipped_by_func == {'method_1': 1, 'method_3': 1}
+    assert profiler.run_by_func == {'method_1': 1}
+    assert profiler.allocated_by_func['method_1'] == pytest.approx(
+        10 ** 6, rel=.05)
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
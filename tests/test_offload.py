@@ -0,0 +1,104 @@
+"""Test Offload decorator."""
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Offload, get_pool, shutdown_pools
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+    def method_1(self, x):
+        return x + self.offset, threading.get_ident()
+
+    def method_2(self, x, y=1):
+        return x * y + self.offset, os.getpid()
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_offload_thread():
+    """Test offloading calls to a thread pool."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    with pytest.raises(ValueError, match='`executor` should be'):
+        Offload('gpu')
+
+    offload = Offload(max_workers=2)
+    MyClass_deco = MethodsDecorator(mapping={offload: 'method_1'})(MyClass)
+    instance = MyClass_deco(offset=10)
+
+    future = instance.method_1(1)
+    assert isinstance(future, Future)
+    out, thread_id = future.result()
+    assert out == 11 and thread_id != threading.get_ident()
+    assert offload.pool is get_pool('thread', 2)
+    assert offload.run_by_func == {'MyClass.method_1': 1}
+
+    # awaitable in async contexts
+    async def main():
+        return await asyncio.gather(*[instance.method_1(i) for i in range(4)])
+
+    assert [out for out, _ in asyncio.run(main())] == [10, 11, 12, 13]
+
+    # inactive decorator: run on the calling thread
+    offload.deactivate()
+    assert instance.method_1(1) == (11, threading.get_ident())
+    offload.activate()
+
+    # executor managed by the caller
+    with ThreadPoolExecutor(1) as executor:
+        offload.executor = executor
+        assert offload.pool is executor
+        assert instance.method_1(2).result()[0] == 12
+        # copies keep running methods on the executor
+        c_offload = deepcopy(offload)
+        assert c_offload.pool is executor
+        assert c_offload.run_by_func == offload.run_by_func
+
+    shutdown_pools()
+    unregister_all()
+
+
+def test_offload_process():
+    """Test offloading calls to a process pool."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    offload = Offload('process', max_workers=1)
+    MyClass_deco = MethodsDecorator(mapping={offload: 'method_2'})(MyClass)
+    instance = MyClass_deco(offset=1)
+
+    futures = [instance.method_2(i, y=2) for i in range(5)]
+    outs = [future.result() for future in futures]
+    assert [out for out, _ in outs] == [1, 3, 5, 7, 9]
+    assert all(pid != os.getpid() for _, pid in outs)
+
+    shutdown_pools()
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+"""Test OpenMetrics exposition."""
+from copy import deepcopy
+from urllib.request import urlopen
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import ConcurrencyLimiter, Timer
+from pydeco.utils.openmetrics import (CONTENT_TYPE, live_decorators, render,
+                                      serve, write)
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+    def method_2(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_openmetrics(tmpdir):
+    """Test rendering, writing and serving decorators statistics."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = 1
+
+    unregister_all()
+
+    timer = Timer(histogram=True)
+    MyClass_deco = MethodsDecorator(
+        mapping={timer: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+    instance_2 = deepcopy(instance)
+
+    instance.method_1()
+    instance.method_2()
+    instance_2.method_1()
+
+    # decorators of both the instance and its copy are found
+    decorators = live_decorators()
+    assert len(decorators) == 2
+    assert {classname for classname, _ in decorators} == {'MyClass'}
+
+    text = render()
+    labels = 'class="MyClass",decorator="Timer",method="method_1"'
+    assert '# TYPE pydeco_calls counter' in text
+    assert 'pydeco_calls_total{' + labels + '} 2.0' in text
+    assert '# TYPE pydeco_latency_seconds histogram' in text
+    assert 'pydeco_latency_seconds_count{' + labels + '} 2' in text
+    assert ('pydeco_latency_seconds_bucket{' + labels + ',le="+Inf"} 2'
+            in text)
+    assert text.endswith('# EOF\n')
+
+    # gauges of decorators of the same type keep their maximum
+    limiters = [ConcurrencyLimiter(1), ConcurrencyLimiter(1)]
+    for limiter, depth in zip(limiters, (5, 3)):
+        limiter.run_by_func['method_1'] = 1
+        limiter.max_depth_by_func['method_1'] = depth
+    limiters_text = render([('MyClass', limiter) for limiter in limiters])
+    labels_2 = labels.replace('Timer', 'ConcurrencyLimiter')
+    assert 'pydeco_limited_calls_total{' + labels_2 + '} 2.0' in limiters_text
+    assert 'pydeco_max_queue_depth{' + labels_2 + '} 5.0' in limiters_text
+
+    path = str(tmpdir.join('metrics.txt'))
+    write(path)
+    with open(path, 'r') as file:
+        assert file.read() == text
+
+    server = serve(port=0, addr='127.0.0.1')
+    try:
+        url = 'http://127.0.0.1:{}/metrics'.format(server.server_address[1])
+        with urlopen(url) as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert response.read().decode('utf-8') == text
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+"""Test overhead budget controller."""
+import time
+
+import pytest
+
+from pydeco import Decorator, MethodsDecorator
+from pydeco.utils import OverheadController
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom func decorators
+# -------------------------------
+
+class CostlyDecorator(Decorator):
+    """Decorator whose cost can be switched on and off."""
+
+    def __init__(self, *args, **kwargs):
+        self.costly = True
+        self.n_wrapped = 0
+        Decorator.__init__(self, *args, **kwargs)
+
+    def wrapper(self, instance, func, *args, **kwargs):
+        """Busy-wait before calling func if costly."""
+        self.n_wrapped += 1
+        if self.costly:
+            ts = time.perf_counter()
+            while time.perf_counter() - ts < 1e-3:
+                pass
+        return func(instance, *args, **kwargs)
+
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def __init__(self, *args, **kwargs):
+        self.sleep = 0
+
+    def method_1(self, *args, **kwargs):
+        if self.sleep:
+            time.sleep(self.sleep)
+
+    def method_2(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_overhead_budget():
+    """Test that a costly decorator is throttled, then re-enabled."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    decorator = CostlyDecorator(overhead_budget=.01)
+    decorator.set_overhead_budget(.01, window=10, min_rate=.5, probe_after=2)
+    controller = decorator.overhead_controller
+    MyClass_deco = MethodsDecorator(
+        mapping={decorator: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+    decorator.deactivate(methods='method_2')
+
+    # decorator overhead >> method time: decorator gets bypassed
+    for _ in range(10):
+        instance.method_1()
+    assert controller.throttled
+    assert decorator.is_active(instance)
+    assert decorator.n_wrapped == 10
+
+    # headroom returns: decorator is probed again and keeps running
+    decorator.costly = False
+    instance.sleep = 2e-3
+    for _ in range(60):
+        instance.method_1()
+    assert not controller.throttled
+    assert decorator.n_wrapped > 10
+    # activation states set by the user are left untouched
+    n_wrapped = decorator.n_wrapped
+    instance.method_2()
+    assert decorator.n_wrapped == n_wrapped
+    assert not decorator.is_active(instance, 'method_2')
+
+    # removing the controller
+    decorator.set_overhead_budget(None)
+    assert decorator.overhead_controller is None
+    assert decorator.sampling is None
+
+    unregister_all()
+
+
+def test_overhead_controller_rate():
+    """Test sampling rate adjustment."""
+    decorator = Decorator()
+    controller = OverheadController(budget=.01, window=2, min_rate=1e-3)
+
+    # 10% overhead: rate lowered to .05 to reach half of the budget
+    controller.record(decorator, .1, 1.)
+    controller.record(decorator, .1, 1.)
+    assert controller.rate == pytest.approx(.05)
+    assert decorator.sample_weight == pytest.approx(20)
+
+    # negligible overhead: rate raised back
+    controller.record(decorator, 0., 1.)
+    controller.record(decorator, 0., 1.)
+    assert controller.rate == 1.
+    assert decorator.sampling is None
+
+    with pytest.raises(ValueError, match='should be positive'):
+        OverheadController(budget=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
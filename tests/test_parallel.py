@@ -0,0 +1,86 @@
+"""Test parallel execution of methods of decorated instances."""
+import os
+import pickle as pkl
+
+import pytest
+from joblib import Parallel, delayed
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Timer
+from pydeco.utils import WorkerContext
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def method_1(self, i):
+        return self.data[i]
+
+
+# Define custom function
+# ----------------------
+
+def myfunc(i, instance):
+    """Call `method_1` and return its output and the worker state."""
+    timer = instance.decorators['Timer']
+    return instance.method_1(i), os.getpid(), timer.run
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_worker_context():
+    """Test shipping decorators and shared instances once per worker."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    MyClass_deco = MethodsDecorator(mapping={Timer(): 'method_1'})(MyClass)
+    instance = MyClass_deco(list(range(1000)))
+
+    context = WorkerContext(instance)
+    shared = context.ref(instance)
+    assert context.decorators == [instance.decorators['Timer']]
+    # tasks only ship the reference
+    assert len(pkl.dumps(shared)) < 128
+    with pytest.raises(ValueError, match='not shared'):
+        context.ref(MyClass_deco([]))
+    with pytest.raises(ValueError, match='not decorated'):
+        WorkerContext(MyClass([]))
+
+    # sequential calls use the instance itself
+    assert shared.method_1(3) == 3
+    assert instance.decorators['Timer'].run == 1
+
+    with context.executor(max_workers=2) as executor:
+        res = list(executor.map(myfunc, range(10), [shared] * 10))
+    assert [out for out, _, _ in res] == list(range(10))
+    assert all(pid != os.getpid() for _, pid, _ in res)
+    # the timer shipped to each worker counts calls of its worker
+    for pid in set(pid for _, pid, _ in res):
+        runs = [run for _, pid_, run in res if pid_ == pid]
+        assert runs == list(range(2, 2 + len(runs)))
+
+    res = Parallel(n_jobs=2, backend=context.joblib_backend())(
+        delayed(myfunc)(i, shared) for i in range(10))
+    assert [out for out, _, _ in res] == list(range(10))
+
+    # parent statistics are unchanged
+    assert instance.decorators['Timer'].run == 1
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,84 @@
+"""Test ScalingProfiler decorator."""
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import ScalingProfiler, default_size
+from pydeco.decorators import scaling as scaling_module
+from pydeco.utils.register import unregister_all
+
+# fake clock (in s) advanced by methods of `MyClass`
+clock = [0.]
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def linear(self, data):
+        clock[0] += len(data) * 1e-6
+
+    def quadratic(self, n):
+        clock[0] += n ** 2 * 1e-8
+
+
+class Array():
+    """Array-like object."""
+
+    size = 12
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_default_size():
+    """Test automatic size extraction."""
+    assert default_size([1, 2, 3]) == 3
+    assert default_size(Array()) == 12
+    assert default_size(b'abcd') == 4
+    assert default_size(memoryview(bytearray(8)).cast('d')) == 8
+    assert default_size(1, data='ab') == 2
+    assert default_size(1, 2.) is None
+
+
+def test_scaling_profiler(monkeypatch):
+    """Test empirical scaling estimation."""
+    # deterministic durations
+    monkeypatch.setattr(scaling_module, 'perf_counter', lambda: clock[0])
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    profiler = ScalingProfiler()
+    profiler_n = ScalingProfiler(size=lambda n: n)
+    MyClass_deco = MethodsDecorator(
+        mapping={profiler: 'linear', profiler_n: 'quadratic'})(MyClass)
+    instance = MyClass_deco()
+
+    for size in (2 ** 12, 2 ** 14, 2 ** 16):
+        for _ in range(3):
+            instance.linear(list(range(size)))
+    for n in (2 ** 7, 2 ** 8, 2 ** 9):
+        instance.quadratic(n)
+
+    scaling = profiler.scaling('linear')
+    assert [bucket[:2] for bucket in scaling['buckets']] == [
+        (2 ** 12, 3), (2 ** 14, 3), (2 ** 16, 3)]
+    assert scaling['exponent'] == pytest.approx(1.)
+    assert scaling['time_per_element'] == pytest.approx(1e-6)
+
+    assert profiler_n.scaling('quadratic')['exponent'] == pytest.approx(2.)
+
+    with pytest.raises(ValueError, match='No call recorded'):
+        profiler.scaling('quadratic')
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
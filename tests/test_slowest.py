@@ -0,0 +1,104 @@
+"""Test SlowestCalls decorator."""
+import pickle as pkl
+import threading
+import time
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import SlowestCalls, summarize
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, sleep, data=None):
+        time.sleep(sleep)
+
+
+class Array():
+    """Array-like object."""
+
+    shape = (3, 4)
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_summarize():
+    """Test argument summaries."""
+    assert summarize(3) == ('int',)
+    assert summarize('abc') == ('str', 3)
+    assert summarize([1, 2]) == ('list', 2)
+    assert summarize(Array()) == ('Array', (3, 4))
+
+
+def test_slowest_calls():
+    """Test that the slowest calls are kept."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    slowest = SlowestCalls(n=2)
+    MyClass_deco = MethodsDecorator(mapping={slowest: 'method_1'})(MyClass)
+    instance = MyClass_deco()
+
+    for sleep in (.001, .02, .002, .01, .003):
+        instance.method_1(sleep, data=[0] * int(sleep * 1000))
+
+    calls = slowest.slowest('method_1')
+    assert len(calls) == 2
+    assert calls[0].duration >= .02 and .01 <= calls[1].duration < .02
+    assert calls[0].args == (('float',),)
+    assert calls[0].kwargs == {'data': ('list', 20)}
+    assert calls[0].timestamp <= time.time()
+
+    with pytest.raises(ValueError, match='No call recorded'):
+        slowest.slowest('method_2')
+
+    slowest.clear()
+    assert slowest.heaps == {}
+
+    unregister_all()
+
+
+def test_slowest_calls_threads():
+    """Test recording calls from concurrent threads."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    slowest = SlowestCalls(n=5)
+    MyClass_deco = MethodsDecorator(mapping={slowest: 'method_1'})(MyClass)
+    instance = MyClass_deco()
+
+    def run():
+        for _ in range(200):
+            instance.method_1(0)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    heap = slowest.heaps['method_1']
+    assert len(heap) == 5
+    assert all(heap[(i - 1) // 2] <= heap[i] for i in range(1, len(heap)))
+    slowest_2 = pkl.loads(pkl.dumps(slowest))
+    assert len(slowest_2.slowest('method_1')) == 5
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,165 @@
+"""Test decorators statistics snapshots."""
+import pickle as pkl
+
+import pytest
+
+from pydeco import Decorator, MethodsDecorator
+from pydeco.decorators import Batcher, ConcurrencyLimiter, Timer
+from pydeco.utils import Snapshot
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+    def method_2(self, x):
+        return self.method_2_batch([x])[0]
+
+    def method_2_batch(self, xs):
+        return xs
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_snapshot(tmpdir):
+    """Test capturing, saving, loading and diffing snapshots."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = Timer(histogram=True)
+    MyClass_deco = MethodsDecorator(mapping={timer: 'method_1'})(MyClass)
+    instance = MyClass_deco()
+
+    for _ in range(10):
+        instance.method_1()
+    snapshot_1 = Snapshot.capture()
+    for _ in range(5):
+        instance.method_1()
+    snapshot_2 = Snapshot.capture([('MyClass', timer)])
+    snapshot_2.timestamp = snapshot_1.timestamp + 2.
+
+    key = ('MyClass', 'Timer', 'calls', 'method_1')
+    assert snapshot_1.values[key] == ('counter', 10)
+    assert snapshot_2.values[key] == ('counter', 15)
+
+    # binary format round trip is smaller than pickling the decorator
+    buffer = snapshot_2.dumps()
+    assert len(buffer) < len(pkl.dumps(timer))
+    path = str(tmpdir.join('snapshot.bin'))
+    snapshot_2.save(path)
+    snapshot = Snapshot.load(path)
+    assert snapshot.timestamp == snapshot_2.timestamp
+    assert snapshot.values[key] == ('counter', 15)
+    histogram_key = ('MyClass', 'Timer', 'latency_seconds', 'method_1')
+    histogram = snapshot.values[histogram_key][1]
+    histogram_2 = snapshot_2.values[histogram_key][1]
+    assert histogram.count == 15
+    assert list(histogram.counts) == list(histogram_2.counts)
+    assert histogram.percentile(50) == histogram_2.percentile(50)
+
+    # diff and rates
+    delta = snapshot.diff(snapshot_1)
+    assert delta.timestamp == pytest.approx(2.)
+    assert delta.values[key] == ('counter', 5)
+    assert delta.values[histogram_key][1].count == 5
+    assert sum(delta.values[histogram_key][1].counts) == 5
+    assert snapshot.rates(snapshot_1)[key] == pytest.approx(2.5)
+    with pytest.raises(ValueError, match='is not older'):
+        snapshot_1.rates(snapshot)
+
+    # histogram cleared, then filled with more values than before
+    histogram_3 = histogram.copy()
+    histogram_3.clear()
+    histogram_3.record(1e3, count=20)
+    snapshot_3 = Snapshot({histogram_key: ('histogram', histogram_3)},
+                          timestamp=snapshot.timestamp + 1.)
+    delta = snapshot_3.diff(snapshot)
+    assert list(delta.values[histogram_key][1].counts) == list(
+        histogram_3.counts)
+    Snapshot.loads(delta.dumps())
+
+    with pytest.raises(ValueError, match='Not a pydeco snapshot'):
+        Snapshot.loads(b'\0' * 64)
+
+    # gauges of decorators of the same type keep their maximum
+    limiters = [ConcurrencyLimiter(1), ConcurrencyLimiter(1)]
+    for limiter, depth in zip(limiters, (5, 3)):
+        limiter.run_by_func['method_1'] = 1
+        limiter.max_depth_by_func['method_1'] = depth
+    snapshot = Snapshot.capture([('MyClass', limiter) for limiter in limiters])
+    key = ('MyClass', 'ConcurrencyLimiter', 'limited_calls', 'method_1')
+    assert snapshot.values[key] == ('counter', 2)
+    key = ('MyClass', 'ConcurrencyLimiter', 'max_queue_depth', 'method_1')
+    assert snapshot.values[key] == ('gauge', 5)
+
+    unregister_all()
+
+
+def test_restore():
+    """Test restoring decorators statistics from snapshots."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = Timer(histogram=True)
+    limiter = ConcurrencyLimiter(2)
+    batcher = Batcher('method_2_batch', max_delay=0.)
+    MyClass_deco = MethodsDecorator(
+        mapping={timer: 'method_1', limiter: 'method_1',
+                 batcher: 'method_2'})(MyClass)
+    instance = MyClass_deco()
+    for i in range(10):
+        instance.method_1()
+        instance.method_2(i)
+    snapshot = Snapshot.loads(Snapshot.capture(
+        [('MyClass', timer), ('MyClass', limiter),
+         ('MyClass', batcher)]).dumps())
+
+    timer_2 = Timer(histogram=True)
+    timer_2.restore(snapshot, 'MyClass')
+    assert timer_2.run == 10 and timer_2.run_by_func == {'method_1': 10}
+    assert timer_2.total_runtime == pytest.approx(timer.total_runtime)
+    assert (timer_2.percentiles('method_1') ==
+            pytest.approx(timer.percentiles('method_1')))
+    # restored statistics can be merged and recorded into
+    timer_2.merge(timer)
+    timer_2.record('method_1', 1.)
+    assert timer_2.histogram_by_func['method_1'].count == 21
+
+    limiter_2 = ConcurrencyLimiter(2)
+    limiter_2.restore(snapshot, 'MyClass')
+    assert limiter_2.run_by_func == {'method_1': 10}
+    assert limiter_2.wait_by_func['method_1'].count == 10
+    assert limiter_2.max_depth_by_func == limiter.max_depth_by_func
+
+    batcher_2 = Batcher('method_2_batch')
+    batcher_2.restore(snapshot, 'MyClass')
+    assert batcher_2.run_by_func == batcher.run_by_func
+    assert batcher_2.batch_by_func == batcher.batch_by_func
+    assert batcher_2.batch_size_by_func['method_2'].count == 10
+    assert batcher_2.wait_by_func['method_2'].count == 10
+
+    # decorators of other classes or types have nothing to restore
+    timer_2.restore(snapshot, 'OtherClass')
+    assert timer_2.run == 0 and timer_2.histogram_by_func == {}
+    with pytest.raises(NotImplementedError, match='cannot be restored'):
+        Decorator().restore(snapshot, 'MyClass')
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
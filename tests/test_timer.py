@@ -0,0 +1,120 @@
+"""Test Timer decorator."""
+import time
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Timer
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+    def method_2(self, *args, **kwargs):
+        pass
+
+    def method_3(self, *args, **kwargs):
+        time.sleep(.02)
+
+    def method_4(self, *args, **kwargs):
+        # busy loop (on CPU time, robust to CPU load)
+        ts = time.thread_time()
+        while time.thread_time() - ts < .02:
+            pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_timer():
+    """Test Timer decorator."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = Timer()
+    MyClass_deco = MethodsDecorator(
+        mapping={timer: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+
+    instance.method_1()
+    instance.method_1()
+    instance.method_2()
+
+    assert timer.run == 3 and timer.sampled_run == 3
+    assert timer.run_by_func == {'method_1': 2, 'method_2': 1}
+    assert timer.total_runtime == pytest.approx(
+        sum(timer.runtime_by_func.values()))
+
+    # deactivated timer does not measure anything
+    timer.deactivate()
+    instance.method_1()
+    assert timer.run == 3
+    timer.activate()
+
+    unregister_all()
+
+
+def test_timer_sampling():
+    """Test that Timer scales estimated totals when sampling."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = Timer(sample_every=10)
+    MyClass_deco = MethodsDecorator(mapping={timer: 'method_1'})(MyClass)
+    instance = MyClass_deco()
+
+    for _ in range(100):
+        instance.method_1()
+
+    assert timer.sampled_run == 10
+    assert timer.run == 100
+    assert timer.run_by_func == {'method_1': 100}
+
+    unregister_all()
+
+
+def test_timer_cpu_time():
+    """Test CPU time vs wall time split."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    timer = Timer(cpu_time=True)
+    MyClass_deco = MethodsDecorator(
+        mapping={timer: ['method_3', 'method_4']})(MyClass)
+    instance = MyClass_deco()
+
+    instance.method_3()
+    instance.method_4()
+
+    # sleeping method waits, busy method computes
+    wall, cpu, wait = timer.split('method_3')
+    assert wall >= 20 and cpu < 10 and wait > 10
+    wall, cpu, wait = timer.split('method_4')
+    assert wall >= 20 and cpu > 10
+    assert timer.total_cpu_runtime == pytest.approx(
+        sum(timer.cpu_runtime_by_func.values()))
+
+    with pytest.raises(ValueError, match='No CPU time recorded'):
+        Timer().split('method_3')
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,141 @@
+"""Test memory-mapped trace file."""
+import os
+import pickle as pkl
+import subprocess
+import sys
+from copy import deepcopy
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Tracer
+from pydeco.utils import MmapTraceSink, read_trace_file
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_trace_sink(tmpdir):
+    """Test writing and reading back records."""
+    path = str(tmpdir.join('trace-{pid}.bin'))
+    sink = MmapTraceSink(path, capacity=3)
+    for i in range(5):
+        sink.write('method_{}'.format(i), 1, 2, float(i), .5)
+
+    # oldest records are overwritten
+    records = sink.read()
+    assert [record[0] for record in records] == [
+        'method_2', 'method_3', 'method_4']
+    assert records[0] == ('method_2', 1, 2, 2., .5)
+
+    sink.flush()
+    assert read_trace_file(sink.filename) == records
+
+    sink.clear()
+    assert sink.read() == []
+    sink.close()
+
+    with open(str(tmpdir.join('other.bin')), 'wb') as file:
+        file.write(b'\0' * 64)
+    with pytest.raises(ValueError, match='Not a pydeco trace file'):
+        read_trace_file(str(tmpdir.join('other.bin')))
+
+
+def test_trace_sink_crash(tmpdir):
+    """Test that records survive a crash of the writing process."""
+    path = str(tmpdir.join('trace.bin'))
+    code = (
+        'import os\n'
+        'from pydeco.utils import MmapTraceSink\n'
+        'sink = MmapTraceSink({!r}, capacity=16)\n'
+        'for i in range(10):\n'
+        '    sink.write("method", os.getpid(), 0, float(i), 1.)\n'
+        'os._exit(1)\n'.format(path))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [p for p in [env.get('PYTHONPATH')] if p])
+    assert subprocess.call([sys.executable, '-c', code], env=env) == 1
+
+    records = read_trace_file(path)
+    assert len(records) == 10
+    assert [record[3] for record in records] == [float(i) for i in range(10)]
+
+
+def test_tracer_with_sink(tmpdir):
+    """Test Tracer recording into a trace sink."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    sink = MmapTraceSink(str(tmpdir.join('trace.bin')), capacity=8)
+    tracer = Tracer(sink=sink)
+    MyClass_deco = MethodsDecorator(mapping={tracer: 'method_1'})(MyClass)
+    instance = MyClass_deco()
+
+    instance.method_1()
+    instance.method_1()
+
+    assert len(tracer.records) == 2
+    assert tracer.records[0][0] == 'MyClass.method_1'
+    assert len(read_trace_file(sink.filename)) == 2
+
+    # copies of the tracer do not overwrite its records
+    c_tracer = deepcopy(tracer)
+    assert c_tracer.sink.filename != sink.filename
+    assert c_tracer.records == []
+    assert len(tracer.records) == 2
+
+    # forked children do not truncate the file of the parent
+    if hasattr(os, 'fork'):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                instance.method_1()
+                sink.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert len(read_trace_file(sink.filename)) == 2
+        assert len(read_trace_file('{}.{}'.format(sink.filename, pid))) == 1
+    sink.close()
+
+    unregister_all()
+
+
+def test_trace_sink_copies(tmpdir):
+    """Test that copies of a sink do not write to the original file."""
+    sink = MmapTraceSink(str(tmpdir.join('trace.bin')), capacity=8)
+    for i in range(3):
+        sink.write('original', 1, 2, float(i), .5)
+
+    for c_sink in (deepcopy(sink), pkl.loads(pkl.dumps(sink))):
+        assert c_sink.filename != sink.filename
+        c_sink.write('copy', 1, 2, 0., .5)
+        c_sink.flush()
+        assert len(read_trace_file(c_sink.filename)) == 1
+        c_sink.close()
+
+    sink.flush()
+    records = read_trace_file(sink.filename)
+    assert [record[0] for record in records] == ['original'] * 3
+    sink.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,96 @@
+"""Test Tracer decorator."""
+import json
+import os
+import pickle as pkl
+
+import pytest
+
+from pydeco import MethodsDecorator
+from pydeco.decorators import Tracer
+from pydeco.utils.register import unregister_all
+
+
+# Utils
+# -----------------------------------------------------------------------------
+
+# Defining custom processing class
+# --------------------------------
+
+class MyClass():
+    """Custom class."""
+
+    def method_1(self, *args, **kwargs):
+        self.method_2()
+
+    def method_2(self, *args, **kwargs):
+        pass
+
+
+# Tests
+# ----------------------------------------------------------------------------
+
+def test_tracer(tmpdir):
+    """Test nested call recording and Chrome trace export."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    tracer = Tracer(capacity=16)
+    MyClass_deco = MethodsDecorator(
+        mapping={tracer: ['method_1', 'method_2']})(MyClass)
+    instance = MyClass_deco()
+
+    instance.method_1()
+
+    events = tracer.to_chrome_trace()['traceEvents']
+    assert [event['name'] for event in events] == [
+        'MyClass.method_1', 'MyClass.method_2']
+    outer, inner = events
+    assert all(event['ph'] == 'X' for event in events)
+    assert outer['pid'] == inner['pid'] == os.getpid()
+    assert outer['tid'] == inner['tid']
+    # method_2 slice is nested in method_1 slice
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+    # export and flush
+    path = str(tmpdir.join('trace.json'))
+    tracer.flush(path)
+    with open(path, 'r') as file:
+        assert len(json.load(file)['traceEvents']) == 2
+    assert tracer.records == []
+
+    unregister_all()
+
+
+def test_tracer_ring_buffer():
+    """Test that the Tracer keeps only the latest records."""
+    from pydeco.utils.parser import CONFIG
+    CONFIG['N_DISPATCH'] = None
+
+    unregister_all()
+
+    tracer = Tracer(capacity=4)
+    MyClass_deco = MethodsDecorator(mapping={tracer: 'method_2'})(MyClass)
+    instance = MyClass_deco()
+
+    for _ in range(10):
+        instance.method_2()
+    records = tracer.records
+    assert len(records) == 4
+
+    # state survives pickling
+    tracer_2 = pkl.loads(pkl.dumps(tracer))
+    assert tracer_2.records == records
+    instance.method_2()
+    assert len(tracer.records) == 4
+    assert tracer.records[-1][3] > records[-1][3]
+    # pickling does not move the cursor: the oldest record is overwritten
+    assert tracer.records[:3] == records[1:]
+
+    unregister_all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])